@@ -0,0 +1,108 @@
+# MyMilvus/document_store.py
+# Local copy of each collection's document text keyed by Milvus primary key, so searches can
+# return IDs only and the text is read from a memory-mapped file that stays in the page cache.
+import json
+import mmap
+import os
+import threading
+import zlib
+from pathlib import Path
+from typing import Iterable, Optional
+
+DOCSTORE_FORMAT_VERSION = 1
+
+
+def write_document_store(
+    path,
+    documents: Iterable[tuple[int, str]],
+    compress: bool = True,
+    collection_version: Optional[str] = None,
+) -> int:
+    """
+    Write (id, text) pairs to <path>.docs (concatenated, optionally zlib-compressed) and
+    <path>.index.json (id -> offset, length). Both files are replaced atomically.
+
+    collection_version (see milvus_collections.collection_version) ties the store to the
+    collection it was built from, since ids are reused when a collection is re-ingested.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data_path, index_path = path.with_suffix(".docs"), path.with_suffix(".index.json")
+
+    offsets, offset = {}, 0
+    with open(f"{data_path}.tmp", "wb") as f:
+        for doc_id, text in documents:
+            payload = text.encode("utf-8")
+            if compress:
+                payload = zlib.compress(payload)
+            f.write(payload)
+            offsets[str(doc_id)] = [offset, len(payload)]
+            offset += len(payload)
+
+    with open(f"{index_path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "format_version": DOCSTORE_FORMAT_VERSION,
+                "collection_version": collection_version,
+                "compressed": compress,
+                "offsets": offsets,
+            },
+            f,
+        )
+    os.replace(f"{data_path}.tmp", data_path)
+    os.replace(f"{index_path}.tmp", index_path)
+    return len(offsets)
+
+
+# Read-only view over a store written by write_document_store(); safe to share between threads.
+class DocumentStore:
+    def __init__(self, path, collection_version: Optional[str] = None):
+        """With collection_version, refuse a store built from another version of the collection."""
+        path = Path(path)
+        with open(path.with_suffix(".index.json"), "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("format_version") != DOCSTORE_FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported document store format {index.get('format_version')} at {path}"
+            )
+        if collection_version is not None and index.get("collection_version") != collection_version:
+            raise ValueError(
+                f"Document store {path} was built from collection version "
+                f"{index.get('collection_version')}, but the collection is at {collection_version}; "
+                "rebuild it with `ingest --docstore` or `snapshot-import --docstore`"
+            )
+        self.collection_version = index.get("collection_version")
+        self.compressed = index["compressed"]
+        self.offsets = {int(doc_id): tuple(span) for doc_id, span in index["offsets"].items()}
+        self.data_path = path.with_suffix(".docs")
+        self._mmap = None
+        self._lock = threading.Lock()
+
+    def _view(self):
+        # Mapped on first read. mmap rejects empty files, which only hold empty documents.
+        with self._lock:
+            if self._mmap is None:
+                with open(self.data_path, "rb") as f:
+                    if os.fstat(f.fileno()).st_size == 0:
+                        return b""
+                    self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return self._mmap
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __contains__(self, doc_id) -> bool:
+        return doc_id in self.offsets
+
+    def get(self, doc_id: int) -> str:
+        offset, length = self.offsets[doc_id]
+        payload = self._view()[offset : offset + length]
+        if self.compressed:
+            payload = zlib.decompress(payload)
+        return payload.decode("utf-8")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
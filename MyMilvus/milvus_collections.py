@@ -42,3 +42,50 @@ def load_collection_names(
         key: _ensure_demo_suffix(configured.get(key, default))
         for key, default in DEFAULT_COLLECTIONS.items()
     }
+
+
+def row_text(row: dict) -> str:
+    """The embedded text of a row; the suppliers collection stores it as "description"."""
+    return row.get("text") or row.get("description") or ""
+
+
+def collection_versions(client, collections: Dict[str, str]) -> Dict[str, str]:
+    """
+    Version each collection by its Milvus collection id and row count.
+
+    milvus_init.py drops and recreates collections on every ingest, which assigns a new
+    collection id, so a re-ingest invalidates anything cached against the previous data.
+    """
+    return {key: collection_version(client, name) for key, name in collections.items()}
+
+
+def collection_version(client, collection_name: str) -> str:
+    if not client.has_collection(collection_name):
+        return "missing"
+    info = client.describe_collection(collection_name)
+    stats = client.get_collection_stats(collection_name)
+    return f"{info.get('collection_id')}:{stats.get('row_count')}"
+
+
+def iter_collection_rows(client, collection_name: str, output_fields: list, batch_size: int = 1000):
+    """Stream every row of a collection with the requested fields."""
+    iterator = client.query_iterator(
+        collection_name=collection_name,
+        batch_size=batch_size,
+        filter="id >= 0",
+        output_fields=output_fields,
+    )
+    try:
+        while True:
+            batch = iterator.next()
+            if not batch:
+                break
+            yield from batch
+    finally:
+        iterator.close()
+
+
+def iter_collection_texts(client, collection_name: str, batch_size: int = 1000):
+    """Stream the `text` field of every row, e.g. for batch passes over the contracts collection."""
+    for row in iter_collection_rows(client, collection_name, ["text"], batch_size):
+        yield row.get("text", "")
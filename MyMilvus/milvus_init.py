@@ -4,193 +4,179 @@ import os
 from glob import glob
 from pathlib import Path
 
-from pymilvus import MilvusClient, model
-
-from MyMilvus.milvus_collections import load_collection_names
+from MyMilvus.document_store import write_document_store
+from MyMilvus.milvus_collections import collection_version, load_collection_names, row_text
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 
+EXPECTED_SUPPLIER_FIELDS = [
+    "supplier_id",
+    "name",
+    "category",
+    "region",
+    "contact_email",
+    "sustainability_score",
+    "contract_active",
+    "last_audit_date",
+]
 
-# ----------------------------
-# Milvus client init
-# ----------------------------
-client = MilvusClient(uri="http://localhost:19530", user="root", password="Milvus")
 
 # ----------------------------
-# Embedding model init
+# Milvus client init
 # ----------------------------
-openai_ef = model.dense.OpenAIEmbeddingFunction(
-    model_name="text-embedding-3-small",
-    api_key=os.environ["OPENAI_API_KEY"],
-)
-
-collections = load_collection_names()
-
-
-# -----------------------------------------------------------
-# 1) SUPPLIERS COLLECTION (from suppliers.csv)
-# -----------------------------------------------------------
-SUPPLIER_COLLECTION = collections["suppliers"]
-
-if client.has_collection(SUPPLIER_COLLECTION):
-    # Replace any previous demo collection so the run is idempotent.
-    client.drop_collection(SUPPLIER_COLLECTION)
-
-client.create_collection(
-    collection_name=SUPPLIER_COLLECTION,
-    dimension=1536,
-    vector_field="vector",
-    primary_field="id",
-    id_type="int",
-    enable_dynamic_field=True,
-)
-
-print(f"Created collection: {SUPPLIER_COLLECTION}")
-
-
-supplier_rows = []
-
-with open("mock_data/suppliers.csv", newline="", encoding="utf-8") as f:
-    reader = csv.DictReader(f)
-
-    expected_fields = [
-        "supplier_id",
-        "name",
-        "category",
-        "region",
-        "contact_email",
-        "sustainability_score",
-        "contract_active",
-        "last_audit_date",
-    ]
-
-    # Safety check
-    if reader.fieldnames != expected_fields:
-        raise ValueError(
-            f"CSV columns do not match expected structure.\n"
-            f"Expected: {expected_fields}\n"
-            f"Got:      {reader.fieldnames}"
-        )
+def get_client(uri="http://localhost:19530", user="root", password="Milvus"):
+    from pymilvus import MilvusClient
 
-    for i, row in enumerate(reader):
-        supplier_id = row["supplier_id"]
-
-        # Build a structured description for embeddings
-        description = (
-            f"Supplier {row['name']} (ID {row['supplier_id']}) operates in the {row['category']} domain, "
-            f"serving customers in the {row['region']} region. "
-            f"Contact email: {row['contact_email']}. "
-            f"Sustainability score: {row['sustainability_score']}. "
-            f"Contract active: {row['contract_active']}. "
-            f"Last audit date: {row['last_audit_date']}."
-        )
+    return MilvusClient(uri=uri, user=user, password=password)
 
-        # Embed description using Milvus 2.6.4 embedding API
-        emb = openai_ef.encode_documents([description])[0]
 
-        supplier_rows.append(
-            {
-                "id": i,
-                "supplier_id": supplier_id,
-                "description": description,
-                "vector": emb,
-            }
-        )
+def recreate_collection(client, collection_name, dimension=1536):
+    if client.has_collection(collection_name):
+        # Replace any previous demo collection so the run is idempotent.
+        client.drop_collection(collection_name)
 
-client.insert(SUPPLIER_COLLECTION, supplier_rows)
+    client.create_collection(
+        collection_name=collection_name,
+        dimension=dimension,
+        vector_field="vector",
+        primary_field="id",
+        id_type="int",
+        enable_dynamic_field=True,
+    )
 
-print(f"Inserted {len(supplier_rows)} suppliers\n")
+    print(f"Created collection: {collection_name}")
 
 
 # -----------------------------------------------------------
-# 2 CONTRACTS COLLECTION (SUP-XXXX.md)
+# 1) SUPPLIERS COLLECTION (from suppliers.csv)
 # -----------------------------------------------------------
-CONTRACT_COLLECTION = collections["contracts"]
+def ingest_suppliers(client, embedding_fn, collection_name, csv_path="mock_data/suppliers.csv"):
+    recreate_collection(client, collection_name)
 
-if client.has_collection(CONTRACT_COLLECTION):
-    client.drop_collection(CONTRACT_COLLECTION)
+    supplier_rows = []
 
-client.create_collection(
-    collection_name=CONTRACT_COLLECTION,
-    dimension=1536,
-    vector_field="vector",
-    primary_field="id",
-    id_type="int",
-    enable_dynamic_field=True,
-)
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
 
-print(f"Created collection: {CONTRACT_COLLECTION}")
+        # Safety check
+        if reader.fieldnames != EXPECTED_SUPPLIER_FIELDS:
+            raise ValueError(
+                f"CSV columns do not match expected structure.\n"
+                f"Expected: {EXPECTED_SUPPLIER_FIELDS}\n"
+                f"Got:      {reader.fieldnames}"
+            )
 
+        for i, row in enumerate(reader):
+            supplier_id = row["supplier_id"]
 
-contract_rows = []
-contract_files = glob("mock_data/contracts/SUP-*.md")
+            # Build a structured description for embeddings
+            description = (
+                f"Supplier {row['name']} (ID {row['supplier_id']}) operates in the {row['category']} domain, "
+                f"serving customers in the {row['region']} region. "
+                f"Contact email: {row['contact_email']}. "
+                f"Sustainability score: {row['sustainability_score']}. "
+                f"Contract active: {row['contract_active']}. "
+                f"Last audit date: {row['last_audit_date']}."
+            )
 
-for idx, filepath in enumerate(contract_files):
-    supplier_id = os.path.basename(filepath).split(".")[0]  # SUP-1001
+            # Embed description using Milvus 2.6.4 embedding API
+            emb = embedding_fn.encode_documents([description])[0]
 
-    with open(filepath, "r", encoding="utf-8") as f:
-        content = f.read().strip()
+            supplier_rows.append(
+                {
+                    "id": i,
+                    "supplier_id": supplier_id,
+                    "description": description,
+                    "vector": emb,
+                }
+            )
 
-    # embed contract text
-    emb = openai_ef.encode_documents([content])[0]
+    client.insert(collection_name, supplier_rows)
 
-    contract_rows.append(
-        {
-            "id": idx,
-            "supplier_id": supplier_id,
-            "text": content,
-            "vector": emb,
-        }
-    )
-
-client.insert(CONTRACT_COLLECTION, contract_rows)
-
-print(f"Inserted {len(contract_rows)} contract docs\n")
+    print(f"Inserted {len(supplier_rows)} suppliers\n")
+    return supplier_rows
 
 
 # -----------------------------------------------------------
-# 3) AUDITS COLLECTION (SUP-XXXX.md)
+# 2) CONTRACTS / 3) AUDITS COLLECTIONS (SUP-XXXX.md)
 # -----------------------------------------------------------
-AUDIT_COLLECTION = collections["audits"]
-
-if client.has_collection(AUDIT_COLLECTION):
-    client.drop_collection(AUDIT_COLLECTION)
+def ingest_documents(client, embedding_fn, collection_name, pattern):
+    recreate_collection(client, collection_name)
 
-client.create_collection(
-    collection_name=AUDIT_COLLECTION,
-    dimension=1536,
-    vector_field="vector",
-    primary_field="id",
-    id_type="int",
-    enable_dynamic_field=True,
-)
+    rows = []
+    for idx, filepath in enumerate(glob(pattern)):
+        supplier_id = os.path.basename(filepath).split(".")[0]  # SUP-1001
 
-print(f"Created collection: {AUDIT_COLLECTION}")
+        with open(filepath, "r", encoding="utf-8") as f:
+            content = f.read().strip()
 
+        # embed document text
+        emb = embedding_fn.encode_documents([content])[0]
 
-audit_rows = []
-audit_files = glob("mock_data/audits/SUP-*.md")
+        rows.append(
+            {
+                "id": idx,
+                "supplier_id": supplier_id,
+                "text": content,
+                "vector": emb,
+            }
+        )
 
-for idx, filepath in enumerate(audit_files):
-    supplier_id = os.path.basename(filepath).split(".")[0]
+    client.insert(collection_name, rows)
 
-    with open(filepath, "r", encoding="utf-8") as f:
-        content = f.read().strip()
+    print(f"Inserted {len(rows)} docs into {collection_name}\n")
+    return rows
 
-    emb = openai_ef.encode_documents([content])[0]
 
-    audit_rows.append(
-        {
-            "id": idx,
-            "supplier_id": supplier_id,
-            "text": content,
-            "vector": emb,
-        }
-    )
+def main(data_dir="mock_data", snapshot=None, docstore=None):
+    """
+    With snapshot, unchanged documents reuse the snapshot's vectors instead of being re-embedded.
+    With docstore, each collection's text is also written to a local document store for ID-only search.
+    """
+    # Heavy clients are only built when an ingest actually runs.
+    from config.retrievers import EMBEDDING_DIMENSION, EMBEDDING_MODEL, get_embedding_function
 
-client.insert(AUDIT_COLLECTION, audit_rows)
+    client = get_client()
+    collections = load_collection_names()
+    if snapshot:
+        from MyMilvus.snapshots import SnapshotEmbeddingFunction, snapshot_vectors
 
-print(f"Inserted {len(audit_rows)} audit docs\n")
+        embedding_fn = SnapshotEmbeddingFunction(
+            snapshot_vectors(snapshot, EMBEDDING_MODEL, EMBEDDING_DIMENSION),
+            get_embedding_function,
+        )
+    else:
+        embedding_fn = get_embedding_function()
+
+    ingested = {
+        "suppliers": ingest_suppliers(
+            client, embedding_fn, collections["suppliers"], f"{data_dir}/suppliers.csv"
+        ),
+        "contracts": ingest_documents(
+            client, embedding_fn, collections["contracts"], f"{data_dir}/contracts/SUP-*.md"
+        ),
+        "audits": ingest_documents(
+            client, embedding_fn, collections["audits"], f"{data_dir}/audits/SUP-*.md"
+        ),
+    }
+
+    if docstore:
+        for key, rows in ingested.items():
+            # Flushed so the row count recorded in the store's version is final.
+            client.flush(collections[key])
+            write_document_store(
+                Path(docstore) / collections[key],
+                ((row["id"], row_text(row)) for row in rows),
+                collection_version=collection_version(client, collections[key]),
+            )
+        print(f"Document stores written to {docstore}")
+
+    if snapshot:
+        print(
+            f"Reused {embedding_fn.reused} snapshot vectors, embedded {embedding_fn.embedded} documents."
+        )
+    print("All data imported successfully.")
 
 
-print("All data imported successfully.")
+if __name__ == "__main__":
+    main()
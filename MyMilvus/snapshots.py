@@ -0,0 +1,197 @@
+# MyMilvus/snapshots.py
+# Portable embedding snapshots: vectors as float32 .npy plus a JSONL row index per collection,
+# so a fresh environment can be bootstrapped without a single embedding call.
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from MyMilvus.milvus_collections import collection_version, iter_collection_rows, row_text
+
+SNAPSHOT_FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def export_snapshot(
+    client,
+    collections: Dict[str, str],
+    snapshot_dir,
+    embedding_model: str,
+    dimension: int,
+    batch_size: int = 1000,
+) -> dict:
+    """
+    Dump every row of each collection: vectors to <key>.vectors.npy, and id, supplier_id,
+    text_hash and the remaining fields to <key>.rows.jsonl. The manifest is written last,
+    so a snapshot without one is incomplete.
+    """
+    import numpy as np
+
+    snapshot_dir = Path(snapshot_dir)
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+    manifest = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "embedding_model": embedding_model,
+        "dimension": dimension,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "collections": {},
+    }
+
+    for key, name in collections.items():
+        vectors = []
+        rows_file = f"{key}.rows.jsonl"
+        with open(snapshot_dir / rows_file, "w", encoding="utf-8") as f:
+            for row in iter_collection_rows(client, name, ["*"], batch_size):
+                row = dict(row)
+                vector = row.pop("vector")
+                if len(vector) != dimension:
+                    raise ValueError(
+                        f"{name} row {row.get('id')} has dimension {len(vector)}, expected {dimension}"
+                    )
+                vectors.append(vector)
+                row["text_hash"] = text_hash(row_text(row))
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+        vectors_file = f"{key}.vectors.npy"
+        np.save(
+            snapshot_dir / vectors_file,
+            np.asarray(vectors, dtype=np.float32).reshape(len(vectors), dimension),
+        )
+        manifest["collections"][key] = {
+            "collection": name,
+            "rows": len(vectors),
+            "vectors": vectors_file,
+            "index": rows_file,
+        }
+
+    with open(snapshot_dir / MANIFEST_NAME, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def read_manifest(
+    snapshot_dir, embedding_model: Optional[str] = None, dimension: Optional[int] = None
+) -> dict:
+    """Load the manifest, refusing snapshots from another format, embedding model or dimension."""
+    path = Path(snapshot_dir) / MANIFEST_NAME
+    if not path.exists():
+        raise ValueError(f"No snapshot manifest at {path} (export incomplete?)")
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported snapshot format {manifest.get('format_version')}, "
+            f"expected {SNAPSHOT_FORMAT_VERSION}"
+        )
+    if embedding_model and manifest["embedding_model"] != embedding_model:
+        raise ValueError(
+            f"Snapshot was embedded with {manifest['embedding_model']}, not {embedding_model}"
+        )
+    if dimension and manifest["dimension"] != dimension:
+        raise ValueError(f"Snapshot dimension is {manifest['dimension']}, not {dimension}")
+    return manifest
+
+
+def iter_snapshot_rows(snapshot_dir, manifest: dict, key: str):
+    """Yield one collection's rows with their vectors; vectors are memory-mapped, not loaded."""
+    import numpy as np
+
+    snapshot_dir = Path(snapshot_dir)
+    entry = manifest["collections"][key]
+    vectors = np.load(snapshot_dir / entry["vectors"], mmap_mode="r")
+    with open(snapshot_dir / entry["index"], "r", encoding="utf-8") as f:
+        for i, line in enumerate(f):
+            row = json.loads(line)
+            row["vector"] = vectors[i]
+            yield row
+
+
+def import_snapshot(
+    client,
+    snapshot_dir,
+    collections: Dict[str, str],
+    embedding_model: str,
+    dimension: int,
+    batch_size: int = 5000,
+    docstore_dir=None,
+) -> Dict[str, int]:
+    """
+    Recreate each collection from the snapshot in large insert batches; returns rows per key.
+    With docstore_dir, the local document stores for ID-only search are rebuilt as well.
+    """
+    from MyMilvus.document_store import write_document_store
+    from MyMilvus.milvus_init import recreate_collection
+
+    manifest = read_manifest(snapshot_dir, embedding_model, dimension)
+    missing = set(collections) - set(manifest["collections"])
+    if missing:
+        raise ValueError(f"Snapshot has no data for collections: {sorted(missing)}")
+
+    inserted = {}
+    for key, name in collections.items():
+        recreate_collection(client, name, dimension=dimension)
+        batch, count = [], 0
+        for row in iter_snapshot_rows(snapshot_dir, manifest, key):
+            row.pop("text_hash")
+            row["vector"] = row["vector"].tolist()
+            batch.append(row)
+            if len(batch) >= batch_size:
+                client.insert(name, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            client.insert(name, batch)
+            count += len(batch)
+        inserted[key] = count
+        print(f"Imported {count} rows into {name}")
+
+        if docstore_dir:
+            client.flush(name)
+            write_document_store(
+                Path(docstore_dir) / name,
+                (
+                    (row["id"], row_text(row))
+                    for row in iter_snapshot_rows(snapshot_dir, manifest, key)
+                ),
+                collection_version=collection_version(client, name),
+            )
+    return inserted
+
+
+def snapshot_vectors(snapshot_dir, embedding_model: str, dimension: int) -> Dict[str, list]:
+    """Map text_hash to vector across every collection of the snapshot."""
+    manifest = read_manifest(snapshot_dir, embedding_model, dimension)
+    return {
+        row["text_hash"]: row["vector"]
+        for key in manifest["collections"]
+        for row in iter_snapshot_rows(snapshot_dir, manifest, key)
+    }
+
+
+# Reuses snapshot vectors for documents whose text is unchanged; only new or edited text is embedded.
+class SnapshotEmbeddingFunction:
+    def __init__(self, vectors_by_hash: Dict[str, list], embedding_fn_factory: Callable):
+        """embedding_fn_factory is only called if some document is missing from the snapshot."""
+        self.vectors_by_hash = vectors_by_hash
+        self.embedding_fn_factory = embedding_fn_factory
+        self.reused = 0
+        self.embedded = 0
+
+    def encode_documents(self, documents: list[str]) -> list:
+        import numpy as np
+
+        vectors = [self.vectors_by_hash.get(text_hash(doc)) for doc in documents]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            fresh = self.embedding_fn_factory().encode_documents([documents[i] for i in missing])
+            for i, vector in zip(missing, fresh):
+                vectors[i] = vector
+        self.embedded += len(missing)
+        self.reused += len(documents) - len(missing)
+        return [np.asarray(vector, dtype=np.float32).tolist() for vector in vectors]
@@ -1,39 +1,147 @@
 # MyMilvus/milvus_retrievers.py
 import os
+from functools import lru_cache
 
 import dspy
-from pymilvus import MilvusClient, model
 
-openai_ef = model.dense.OpenAIEmbeddingFunction(
-    model_name="text-embedding-3-small",
-    api_key=os.environ["OPENAI_API_KEY"],
-)
+from MyMilvus.milvus_collections import row_text
+from runtime.batching import MicroBatcher
+from runtime.singleflight import SingleFlight
+
+# Set by enable_micro_batching(); when present, concurrent query embeddings share one API call.
+_embed_batcher = None
+
+# Identical embeddings and searches issued at the same moment are sent to the backend once.
+SINGLE_FLIGHT = SingleFlight()
+
+
+# The suppliers collection stores its embedded text as "description", the others as "text".
+TEXT_FIELDS = ["text", "description", "supplier_id"]
+
+
+# Embedding snapshots record these so vectors are never mixed across models.
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_DIMENSION = 1536
+
+
+# Built on first use so importing this module needs neither OPENAI_API_KEY nor the embedding extras.
+@lru_cache(maxsize=1)
+def get_embedding_function():
+    from pymilvus import model
+
+    return model.dense.OpenAIEmbeddingFunction(
+        model_name=EMBEDDING_MODEL,
+        api_key=os.environ["OPENAI_API_KEY"],
+    )
+
+
+def embed_queries(texts: list[str]) -> list[list[float]]:
+    return [list(vector) for vector in get_embedding_function().encode_queries(texts)]
+
+
+def embed_query(text: str) -> list[float]:
+    def embed():
+        if _embed_batcher is not None:
+            return _embed_batcher.submit(text)
+        return embed_queries([text])[0]
+
+    return SINGLE_FLIGHT.do(f"embed:{text}", embed)
+
+
+def enable_micro_batching(retrievers, max_batch_size: int = 16, max_wait_ms: float = 5.0):
+    """Batch query embeddings process-wide and vector searches per retriever."""
+    global _embed_batcher
+    if _embed_batcher is None:
+        _embed_batcher = MicroBatcher(embed_queries, max_batch_size, max_wait_ms)
+    for retriever in retrievers:
+        retriever.enable_micro_batching(max_batch_size, max_wait_ms)
+
+
+def enable_document_store(retrievers, docstore_dir):
+    """
+    Search IDs only and read document text from the local stores written at ingestion.
+    Raises ValueError if a store was built from another version of its collection.
+    """
+    from pathlib import Path
+
+    from MyMilvus.document_store import DocumentStore
+    from MyMilvus.milvus_collections import collection_version
+
+    for retriever in retrievers:
+        retriever.document_store = DocumentStore(
+            Path(docstore_dir) / retriever.collection,
+            collection_version=collection_version(retriever.client, retriever.collection),
+        )
 
 
 class MilvusRetriever(dspy.Retrieve):
-    def __init__(self, uri, user, password, collection, top_k=3):
+    def __init__(self, uri, user, password, collection, top_k=3, document_store=None):
         super().__init__(k=top_k)
-        self.client = MilvusClient(uri=uri, user=user, password=password)
+        self.uri = uri
+        self.user = user
+        self.password = password
         self.collection = collection
+        # With a document store, searches return only IDs and scores; text is hydrated locally.
+        self.document_store = document_store
+        self._client = None
+        self._search_batcher = None
+
+    # The connection is opened on first search (or by warm_start), not when the retriever is built.
+    @property
+    def client(self):
+        if self._client is None:
+            from pymilvus import MilvusClient
+
+            self._client = MilvusClient(uri=self.uri, user=self.user, password=self.password)
+        return self._client
+
+    def search_vectors(self, vectors: list[list[float]], k: int) -> list[list[dict]]:
+        return self.client.search(
+            collection_name=self.collection,
+            data=vectors,
+            limit=k,
+            output_fields=[] if self.document_store is not None else TEXT_FIELDS,
+        )
+
+    def hydrate(self, hits: list[dict]) -> list[str]:
+        """Text for ID-only hits from the document store; IDs it lacks are fetched from Milvus."""
+        ids = [h["id"] for h in hits]
+        texts = {i: self.document_store.get(i) for i in ids if i in self.document_store}
+        missing = [i for i in ids if i not in texts]
+        if missing:
+            rows = self.client.get(self.collection, ids=missing, output_fields=TEXT_FIELDS)
+            texts.update({row["id"]: row_text(row) for row in rows})
+        return [texts.get(i, "") for i in ids]
+
+    def enable_micro_batching(self, max_batch_size: int = 16, max_wait_ms: float = 5.0):
+        self._search_batcher = MicroBatcher(
+            lambda vectors: self.search_vectors(vectors, self.k), max_batch_size, max_wait_ms
+        )
 
     def forward(self, query: str, k=None, **kwargs) -> dspy.Prediction:
         k = k or self.k
+        contexts = SINGLE_FLIGHT.do(
+            f"retrieve:{self.collection}:{k}:{query}", lambda: self.search_texts(query, k)
+        )
+        return dspy.Prediction(context=list(contexts))
 
+    def search_texts(self, query: str, k: int) -> list[str]:
         # Embed query using OpenAIEmbedding
-        query_emb = openai_ef.encode_queries([query])[0]
+        query_emb = embed_query(query)
 
-        # Search Milvus
-        hits = self.client.search(
-            collection_name=self.collection,
-            data=[query_emb],
-            limit=k,
-            output_fields=["text", "supplier_id"],
-        )[0]
+        # Search Milvus (batched with concurrent searches when micro-batching is enabled)
+        if self._search_batcher is not None and k == self.k:
+            hits = self._search_batcher.submit(query_emb)
+        else:
+            hits = self.search_vectors([query_emb], k)[0]
+
+        if self.document_store is not None:
+            return self.hydrate(hits)
 
         contexts = []
         for h in hits:
             entity = h["entity"]
-            txt = entity.get("text", "")
+            txt = row_text(entity)
             contexts.append(txt)
 
-        return dspy.Prediction(context=contexts)
+        return contexts
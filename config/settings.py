@@ -1,13 +1,13 @@
 # config/settings.py
 import os
+import time
+from typing import TYPE_CHECKING
 
-import dspy
-from dotenv import load_dotenv
+from MyMilvus.milvus_collections import collection_versions, load_collection_names
 
-from config.retrievers import MilvusRetriever
-from MyMilvus.milvus_collections import load_collection_names
-
-load_dotenv()
+if TYPE_CHECKING:
+    from config.retrievers import MilvusRetriever
+    from runtime.semantic_cache import SemanticCache
 
 
 def configure_dspy(
@@ -15,6 +15,13 @@ def configure_dspy(
     k: int = 3,
 ):
     """Configure DSPy with modern LM and custom RM."""
+    # dspy, dotenv and the retrievers are imported here so that importing config.settings stays cheap.
+    import dspy
+    from dotenv import load_dotenv
+
+    from config.retrievers import MilvusRetriever
+
+    load_dotenv()
 
     if "gpt" in lm_model:
         lm = dspy.LM(model=lm_model, api_key=os.getenv("OPENAI_API_KEY"))
@@ -55,3 +62,34 @@ def configure_dspy(
 
     # Return the retrievers so pipeline.py can use them
     return supplier_r, contract_r, audit_r
+
+
+def configure_semantic_cache(
+    retriever: "MilvusRetriever",
+    threshold: float = 0.95,
+    ttl_seconds: float = 3600.0,
+    max_entries: int = 256,
+    version_refresh_seconds: float = 30.0,
+) -> "SemanticCache":
+    """Build a SemanticCache whose entries are invalidated when any Milvus collection changes."""
+    from config.retrievers import embed_query
+    from runtime.semantic_cache import SemanticCache
+
+    collections = load_collection_names()
+    state = {"checked_at": 0.0, "versions": {}}
+
+    # Polling Milvus on every lookup would cost more than a cache hit, so reuse the last answer briefly.
+    def current_versions() -> dict[str, str]:
+        now = time.time()
+        if now - state["checked_at"] > version_refresh_seconds:
+            state["versions"] = collection_versions(retriever.client, collections)
+            state["checked_at"] = now
+        return state["versions"]
+
+    return SemanticCache(
+        embed_fn=embed_query,
+        threshold=threshold,
+        ttl_seconds=ttl_seconds,
+        max_entries=max_entries,
+        version_fn=current_versions,
+    )
@@ -0,0 +1,71 @@
+# evaluation/dataset.py
+import csv
+import random
+from pathlib import Path
+from typing import Union
+
+import dspy
+
+from modules.safeguards import rule_only_compliance
+
+
+def contract_text(contract_path: Path) -> str:
+    return contract_path.read_text(encoding="utf-8") if contract_path.exists() else ""
+
+
+def expected_compliance(data_dir: Path, row: dict, category: str, budget: str) -> bool:
+    """Whether a supplier's own contract and profile satisfy the rule-only compliance check."""
+    contract = contract_text(data_dir / "contracts" / f"{row['supplier_id']}_contract.md")
+    return rule_only_compliance([contract], " ".join(row.values()), category, budget).is_compliant
+
+
+def build_labeled_requests(
+    data_dir: Union[str, Path] = "mock_data", seed: int = 7
+) -> list[dspy.Example]:
+    """
+    Turn the faker suppliers into labeled procurement requests.
+
+    Each request describes one supplier's category and region with a sampled budget; the labels
+    are the suppliers matching that category and region, the category, and for each of those
+    suppliers whether it satisfies COMPLIANCE_RULES at that budget. Compliance is labelled with
+    the same checks as rule_only_compliance: rule 1 (90-day term over $50,000) and rule 2
+    (ISO 27001 for IT hardware). Rule 3 (budget overrun) cannot fail, because these requests quote
+    no final price.
+    """
+    data_dir = Path(data_dir)
+    rng = random.Random(seed)
+    examples = []
+
+    with (data_dir / "suppliers.csv").open(newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+
+    # Several suppliers can share a category and region; any of them is an acceptable pick.
+    matching = {}
+    for row in rows:
+        matching.setdefault((row["category"], row["region"]), []).append(row)
+
+    for row in rows:
+        budget = rng.choice([20_000, 40_000, 60_000, 90_000])
+        weeks = rng.randint(2, 8)
+        candidates = matching[(row["category"], row["region"])]
+
+        raw_request = (
+            f"We need {row['category']} sourced from {row['region']}. "
+            f"Expected budget: around {budget // 1000}k USD. "
+            f"Delivery must be within {weeks} weeks."
+        )
+        examples.append(
+            dspy.Example(
+                raw_request=raw_request,
+                expected_suppliers=[c["supplier_id"] for c in candidates],
+                expected_category=row["category"],
+                expected_compliance={
+                    c["supplier_id"]: expected_compliance(
+                        data_dir, c, row["category"], f"{budget // 1000}k USD"
+                    )
+                    for c in candidates
+                },
+            ).with_inputs("raw_request")
+        )
+
+    return examples
@@ -0,0 +1,176 @@
+# evaluation/harness.py
+import threading
+import time
+from typing import Any
+
+import dspy
+from dspy.utils.callback import BaseCallback
+
+# Candidate speed/quality trade-offs. "refine" overrides ProcurementWorkflow.refine_config and
+# "top_k" overrides the k of every retriever.
+DEFAULT_EVAL_CONFIGS = {
+    "baseline": {},
+    "refine_n2": {"refine": {"requirement": {"N": 2}, "compliance": {"N": 2}}},
+    "refine_n1": {"refine": {"requirement": {"N": 1}, "compliance": {"N": 1}}},
+    "refine_n1_top_k2": {
+        "refine": {"requirement": {"N": 1}, "compliance": {"N": 1}},
+        "top_k": 2,
+    },
+}
+
+
+def procurement_metric(example, pred, trace=None) -> float:
+    """
+    Average of supplier, category and compliance-outcome correctness.
+
+    The compliance outcome is scored against the label of the supplier the workflow chose; a
+    supplier outside the acceptable set earns no compliance point either.
+    """
+    pred = dict(pred)
+    supplier_ok = pred.get("supplier") in example.expected_suppliers
+    category = str(pred.get("item_category", "")).lower()
+    category_ok = example.expected_category.lower() in category
+    expected = example.expected_compliance.get(pred.get("supplier"))
+    compliance_ok = expected is not None and (pred.get("status") == "APPROVED") == expected
+    return (supplier_ok + category_ok + compliance_ok) / 3
+
+
+class LMCallCounter(BaseCallback):
+    def __init__(self):
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def on_lm_end(self, call_id, outputs, exception=None):
+        with self._lock:
+            self.calls += 1
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[round(fraction * (len(ordered) - 1))]
+
+
+def apply_config(workflow, config: dict[str, Any]) -> dict[str, Any]:
+    """Apply a configuration in place and return what is needed to restore the workflow."""
+    previous = {
+        "refine": {stage: dict(cfg) for stage, cfg in workflow.refine_config.items()},
+        "top_k": {
+            name: getattr(workflow, name).k for name in ("supplier_r", "contract_r", "audit_r")
+        },
+        # State shared across configurations would let a later configuration reuse an earlier
+        # one's work (cached decisions, verdicts, stage outputs, risk profiles), and the adaptive
+        # controller would override N and record eval runs in its statistics.
+        "cache": workflow.cache,
+        "verdict_store": workflow.verdict_store,
+        "checkpoints": workflow.checkpoints,
+        "refine_controller": workflow.refine_controller,
+        "risk_profiles": workflow.risk_profiles,
+    }
+    workflow.cache = None
+    workflow.verdict_store = None
+    workflow.checkpoints = None
+    workflow.refine_controller = None
+    workflow.risk_profiles = {}
+    for stage, overrides in config.get("refine", {}).items():
+        workflow.refine_config[stage].update(overrides)
+    if "top_k" in config:
+        for name in ("supplier_r", "contract_r", "audit_r"):
+            getattr(workflow, name).k = config["top_k"]
+    return previous
+
+
+def restore_config(workflow, previous: dict[str, Any]) -> None:
+    workflow.refine_config = previous["refine"]
+    workflow.cache = previous["cache"]
+    workflow.verdict_store = previous["verdict_store"]
+    workflow.checkpoints = previous["checkpoints"]
+    workflow.refine_controller = previous["refine_controller"]
+    workflow.risk_profiles = previous["risk_profiles"]
+    for name, k in previous["top_k"].items():
+        getattr(workflow, name).k = k
+
+
+def evaluate_config(workflow, devset, config: dict[str, Any], num_threads: int = 8):
+    latencies: list[float] = []
+    lock = threading.Lock()
+
+    def timed_program(**inputs):
+        started = time.perf_counter()
+        try:
+            return workflow(**inputs)
+        finally:
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    counter = LMCallCounter()
+    previous = apply_config(workflow, config)
+    try:
+        # Without the LM response cache, a configuration cannot reuse responses to prompts an
+        # earlier one already sent, which would cost it no time and no tokens.
+        uncached_lm = dspy.settings.lm.copy(cache=False)
+        with dspy.context(lm=uncached_lm, callbacks=[*dspy.settings.callbacks, counter]):
+            with dspy.track_usage() as usage:
+                result = dspy.Evaluate(
+                    devset=devset,
+                    metric=procurement_metric,
+                    num_threads=num_threads,
+                    display_progress=False,
+                )(timed_program)
+    finally:
+        restore_config(workflow, previous)
+
+    tokens = sum(entry.get("total_tokens") or 0 for entry in usage.get_total_tokens().values())
+    n = max(len(devset), 1)
+    return {
+        "accuracy": result.score / 100.0,
+        "p95_latency_seconds": percentile(latencies, 0.95),
+        "lm_calls_per_request": counter.calls / n,
+        "tokens_per_request": tokens / n,
+    }
+
+
+def pareto_report(rows: dict[str, dict[str, float]]) -> list[dict[str, Any]]:
+    """
+    Mark each configuration as Pareto-optimal unless another one is at least as accurate and
+    no slower, cheaper in LM calls and tokens, while strictly better on one of them.
+    """
+    costs = ("p95_latency_seconds", "lm_calls_per_request", "tokens_per_request")
+
+    def dominates(a, b):
+        no_worse = a["accuracy"] >= b["accuracy"] and all(a[c] <= b[c] for c in costs)
+        better = a["accuracy"] > b["accuracy"] or any(a[c] < b[c] for c in costs)
+        return no_worse and better
+
+    report = []
+    for name, row in rows.items():
+        pareto = not any(dominates(other, row) for o, other in rows.items() if o != name)
+        report.append({"config": name, **row, "pareto": pareto})
+    return sorted(report, key=lambda r: r["p95_latency_seconds"])
+
+
+def fastest_meeting_bar(report: list[dict[str, Any]], min_accuracy: float):
+    eligible = [row for row in report if row["accuracy"] >= min_accuracy]
+    return min(eligible, key=lambda r: r["p95_latency_seconds"]) if eligible else None
+
+
+def run_evaluation(workflow, devset, configs=None, num_threads: int = 8):
+    configs = configs or DEFAULT_EVAL_CONFIGS
+    rows = {
+        name: evaluate_config(workflow, devset, config, num_threads)
+        for name, config in configs.items()
+    }
+    return pareto_report(rows)
+
+
+def format_report(report: list[dict[str, Any]]) -> str:
+    header = f"{'config':<22}{'accuracy':>10}{'p95 (s)':>10}{'LM calls':>10}{'tokens':>10}  pareto"
+    lines = [header, "-" * len(header)]
+    for row in report:
+        lines.append(
+            f"{row['config']:<22}{row['accuracy']:>10.3f}{row['p95_latency_seconds']:>10.3f}"
+            f"{row['lm_calls_per_request']:>10.1f}{row['tokens_per_request']:>10.0f}"
+            f"  {'*' if row['pareto'] else ''}"
+        )
+    return "\n".join(lines)
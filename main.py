@@ -1,6 +1,451 @@
-def main():
-    print("Hello from procurement-agent!")
+import argparse
+import json
+import statistics
+import sys
+import time
+
+# Only the standard library is imported at module level: each subcommand pulls in
+# dspy / pymilvus / OpenAI on demand so `--help` and short jobs start instantly.
+
+DEMO_REQUEST = """
+We need IT servers for our Montreal data center upgrade.
+Expected budget: around 40k-60k.
+Delivery must be within 5 weeks.
+"""
+
+
+def build_workflow(args):
+    from config.settings import configure_dspy, configure_semantic_cache
+    from pipeline import ProcurementWorkflow
+
+    if args.standin:
+        from runtime.standin import configure_standin
+
+        agent = ProcurementWorkflow(*configure_standin())
+        if args.artifact:
+            from runtime.artifacts import load_workflow
+
+            load_workflow(agent, args.artifact)
+    elif args.artifact:
+        from runtime.artifacts import warm_start
+
+        agent = warm_start(args.artifact, lm_model=args.lm)
+    else:
+        supplier_r, contract_r, audit_r = configure_dspy(lm_model=args.lm)
+        agent = ProcurementWorkflow(supplier_r, contract_r, audit_r)
+
+    if args.docstore and not args.standin:
+        from config.retrievers import enable_document_store
+
+        enable_document_store([agent.supplier_r, agent.contract_r, agent.audit_r], args.docstore)
+    if args.cache and args.standin:
+        from runtime.standin import configure_standin_cache
+
+        agent.cache = configure_standin_cache()
+    elif args.cache:
+        agent.cache = configure_semantic_cache(agent.supplier_r)
+    if args.verdict_store:
+        from runtime.compliance_store import ComplianceVerdictStore
+
+        agent.verdict_store = ComplianceVerdictStore(args.verdict_store)
+    if args.shortlist_risk:
+        agent.shortlist_risk = True
+    if args.risk_profiles:
+        from runtime.risk_profiles import load_risk_profiles
+
+        agent.risk_profiles.update(load_risk_profiles(args.risk_profiles))
+    if args.adaptive_refine:
+        from runtime.adaptive_refine import AdaptiveRefineController
+
+        agent.refine_controller = AdaptiveRefineController(args.adaptive_refine)
+    if getattr(args, "checkpoints", None):
+        from runtime.checkpoints import CheckpointStore
+
+        agent.checkpoints = CheckpointStore(args.checkpoints)
+    return agent
+
+
+def read_requests(path):
+    """Yield (request_id, raw_request) from a JSONL file, or one request per plain-text line."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                record = json.loads(line)
+                yield str(record.get("request_id", line_no)), record["raw_request"]
+            else:
+                yield str(line_no), line
+
+
+def written_request_ids(path) -> set[str]:
+    """Request IDs with a complete result line in a batch output file."""
+    written = set()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    written.add(str(json.loads(line)["request_id"]))
+                except (ValueError, KeyError, TypeError):
+                    # A line cut short by a crash; its request is run again.
+                    continue
+    except FileNotFoundError:
+        pass
+    return written
+
+
+def ends_mid_line(path) -> bool:
+    """Whether a file's last line was cut short, so the next append must start a new line."""
+    try:
+        with open(path, "rb") as f:
+            f.seek(-1, 2)
+            return f.read(1) != b"\n"
+    except OSError:
+        # Missing or empty.
+        return False
+
+
+def cmd_ingest(args):
+    from MyMilvus.milvus_init import main as ingest
+
+    ingest(data_dir=args.data_dir, snapshot=args.snapshot, docstore=args.docstore)
+
+
+def cmd_snapshot_export(args):
+    from config.retrievers import EMBEDDING_DIMENSION, EMBEDDING_MODEL
+    from MyMilvus.milvus_collections import load_collection_names
+    from MyMilvus.milvus_init import get_client
+    from MyMilvus.snapshots import export_snapshot
+
+    manifest = export_snapshot(
+        get_client(), load_collection_names(), args.output, EMBEDDING_MODEL, EMBEDDING_DIMENSION
+    )
+    rows = {key: entry["rows"] for key, entry in manifest["collections"].items()}
+    print(f"Snapshot written to {args.output}: {rows}")
+
+
+def cmd_snapshot_import(args):
+    from config.retrievers import EMBEDDING_DIMENSION, EMBEDDING_MODEL
+    from MyMilvus.milvus_collections import load_collection_names
+    from MyMilvus.milvus_init import get_client
+    from MyMilvus.snapshots import import_snapshot
+
+    start = time.perf_counter()
+    rows = import_snapshot(
+        get_client(),
+        args.snapshot,
+        load_collection_names(),
+        EMBEDDING_MODEL,
+        EMBEDDING_DIMENSION,
+        batch_size=args.batch_size,
+        docstore_dir=args.docstore,
+    )
+    print(
+        f"Imported {sum(rows.values())} rows in {time.perf_counter() - start:.1f}s, 0 embedding calls"
+    )
+
+
+def cmd_prewarm_compliance(args):
+    from config.business_rules import COMPLIANCE_RULES
+    from MyMilvus.milvus_collections import iter_collection_texts, load_collection_names
+    from runtime.compliance_store import ComplianceVerdictStore, prewarm_compliance_store
+
+    agent = build_workflow(args)
+    # An empty store is falsy (it has __len__), so test for None explicitly.
+    store = agent.verdict_store if agent.verdict_store is not None else ComplianceVerdictStore()
+    contracts = iter_collection_texts(agent.contract_r.client, load_collection_names()["contracts"])
+    count = prewarm_compliance_store(store, contracts, COMPLIANCE_RULES, agent.check_rules)
+    print(f"Compliance verdicts prewarmed for {count} contracts ({len(store)} cached verdicts)")
+
+
+def cmd_precompute_risk(args):
+    from MyMilvus.milvus_collections import iter_collection_rows, load_collection_names
+    from runtime.risk_profiles import (
+        join_supplier_audits,
+        precompute_risk_profiles,
+        save_risk_profiles,
+    )
+
+    agent = build_workflow(args)
+    agent.batch_risk_miner.max_batch_tokens = args.max_batch_tokens
+    names = load_collection_names()
+    supplier_rows = iter_collection_rows(
+        agent.supplier_r.client, names["suppliers"], ["supplier_id", "description"]
+    )
+    audit_rows = iter_collection_rows(
+        agent.audit_r.client, names["audits"], ["supplier_id", "text"]
+    )
+    suppliers = join_supplier_audits(supplier_rows, audit_rows)
+
+    start = time.perf_counter()
+    profiles = precompute_risk_profiles(agent.batch_risk_miner, suppliers)
+    elapsed = time.perf_counter() - start
+    save_risk_profiles(profiles, args.output)
+    print(
+        f"Risk profiles for {len(profiles)}/{len(suppliers)} suppliers written to {args.output} "
+        f"({len(agent.batch_risk_miner.chunk(suppliers))} batches, {elapsed:.1f}s)"
+    )
+
+
+def cmd_refine_stats(args):
+    from runtime.adaptive_refine import AdaptiveRefineController
+
+    controller = AdaptiveRefineController(args.stats)
+    print(json.dumps(controller.stats(), indent=2))
+    controller.close()
+
+
+def cmd_run(args):
+    agent = build_workflow(args)
+    raw_request = args.request or DEMO_REQUEST
+    deadline = time.time() + args.time_budget if args.time_budget else None
+    result = agent(raw_request, deadline=deadline)
+
+    print("\n====== FINAL RESULT ======\n")
+    print(json.dumps(result, indent=2, default=str))
+
+
+def cmd_batch(args):
+    agent = build_workflow(args)
+    # On a resumed run, the output file says which results were already written; a request can
+    # reach its "decision" checkpoint and still crash before its line is written.
+    written = written_request_ids(args.output)
+    with open(args.output, "a", encoding="utf-8") as out:
+        if ends_mid_line(args.output):
+            out.write("\n")
+        for request_id, raw_request in read_requests(args.input):
+            if request_id in written:
+                print(f"[{request_id}] already written, skipping")
+                continue
+            result = None
+            if agent.checkpoints is not None:
+                result = agent.checkpoints.latest(request_id, "decision")
+            if result is None:
+                result = agent(raw_request, request_id=request_id)
+            out.write(json.dumps({"request_id": request_id, "result": result}, default=str) + "\n")
+            out.flush()
+            print(f"[{request_id}] {result.get('status')}")
+
+
+def cmd_bench(args):
+    agent = build_workflow(args)
+    raw_request = args.request or DEMO_REQUEST
+
+    latencies = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        agent(raw_request)
+        latencies.append(time.perf_counter() - started)
+
+    p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0]
+    print(f"runs: {len(latencies)}")
+    print(f"mean: {statistics.mean(latencies):.3f}s")
+    print(f"p50:  {statistics.median(latencies):.3f}s")
+    print(f"p95:  {p95:.3f}s")
+
+
+def cmd_eval(args):
+    from evaluation.dataset import build_labeled_requests
+    from evaluation.harness import (
+        DEFAULT_EVAL_CONFIGS,
+        fastest_meeting_bar,
+        format_report,
+        run_evaluation,
+    )
+
+    configs = DEFAULT_EVAL_CONFIGS
+    if args.configs:
+        with open(args.configs, "r", encoding="utf-8") as f:
+            configs = json.load(f)
+
+    agent = build_workflow(args)
+    devset = build_labeled_requests(args.data_dir)
+    report = run_evaluation(agent, devset, configs, num_threads=args.threads)
+
+    print(format_report(report))
+    best = fastest_meeting_bar(report, args.min_accuracy)
+    if best is None:
+        print(f"\nNo configuration reaches accuracy {args.min_accuracy:.2f}")
+    else:
+        print(f"\nFastest configuration with accuracy >= {args.min_accuracy:.2f}: {best['config']}")
+
+
+def cmd_serve(args):
+    from runtime.server import WorkerPool, serve
+
+    pool = WorkerPool(
+        workers=args.workers,
+        threads_per_worker=args.threads,
+        queue_size=args.queue_size,
+        default_timeout=args.timeout,
+        backend="standin" if args.standin else "openai",
+        lm_model=args.lm,
+        artifact=args.artifact,
+        verdict_store=args.verdict_store,
+        cache=args.cache,
+        micro_batch_size=args.micro_batch_size,
+        micro_batch_wait_ms=args.micro_batch_wait_ms,
+        shortlist_risk=args.shortlist_risk,
+        risk_profiles=args.risk_profiles,
+        docstore=args.docstore,
+        adaptive_refine=args.adaptive_refine,
+    )
+    server = serve(pool, host=args.host, port=args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.close()
+
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got {value}")
+    return number
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="procurement-agent")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    ingest = subparsers.add_parser(
+        "ingest", help="Embed mock data and (re)build Milvus collections."
+    )
+    ingest.add_argument("--data-dir", default="mock_data")
+    ingest.add_argument(
+        "--snapshot", help="Embedding snapshot whose vectors are reused for unchanged documents."
+    )
+    ingest.add_argument(
+        "--docstore", help="Directory for the local document stores used by --docstore searches."
+    )
+    ingest.set_defaults(func=cmd_ingest)
+
+    snapshot_export = subparsers.add_parser(
+        "snapshot-export", help="Dump the Milvus collections and their vectors to a snapshot."
+    )
+    snapshot_export.add_argument("--output", default="artifacts/embeddings_snapshot")
+    snapshot_export.set_defaults(func=cmd_snapshot_export)
+
+    snapshot_import = subparsers.add_parser(
+        "snapshot-import", help="Rebuild the Milvus collections from a snapshot, without embedding."
+    )
+    snapshot_import.add_argument("snapshot", help="Directory written by snapshot-export.")
+    snapshot_import.add_argument("--batch-size", type=int, default=5000)
+    snapshot_import.add_argument("--docstore", help="Also rebuild the local document stores here.")
+    snapshot_import.set_defaults(func=cmd_snapshot_import)
+
+    workflow_args = argparse.ArgumentParser(add_help=False)
+    workflow_args.add_argument("--lm", default="openai/gpt-4o")
+    workflow_args.add_argument("--artifact", help="Compiled workflow artifact to warm-start from.")
+    workflow_args.add_argument("--cache", action="store_true", help="Enable the semantic cache.")
+    workflow_args.add_argument(
+        "--standin", action="store_true", help="Use the local stand-in LM and retrievers."
+    )
+    workflow_args.add_argument(
+        "--verdict-store", help="SQLite file for cached compliance verdicts (shared by workers)."
+    )
+    workflow_args.add_argument(
+        "--docstore",
+        help="Search Milvus for IDs only and read text from the document stores in this directory.",
+    )
+    workflow_args.add_argument(
+        "--adaptive-refine",
+        help="SQLite file of Refine reward statistics; N and temperature adapt to them.",
+    )
+    workflow_args.add_argument(
+        "--shortlist-risk",
+        action="store_true",
+        help="Risk-score all retrieved suppliers in one batched call before ranking.",
+    )
+    workflow_args.add_argument(
+        "--risk-profiles", help="JSON from precompute-risk, used when the risk stage is degraded."
+    )
+
+    run = subparsers.add_parser("run", parents=[workflow_args], help="Run a single request.")
+    run.add_argument("request", nargs="?", help="Procurement request text (demo task if omitted).")
+    run.add_argument(
+        "--time-budget", type=float, help="Seconds to answer within; stages degrade to fit."
+    )
+    run.set_defaults(func=cmd_run)
+
+    batch = subparsers.add_parser(
+        "batch", parents=[workflow_args], help="Run requests from a file."
+    )
+    batch.add_argument("input", help="JSONL with request_id/raw_request, or one request per line.")
+    batch.add_argument("output", help="JSONL file results are appended to.")
+    batch.add_argument(
+        "--checkpoints", help="SQLite checkpoint file; rerun with the same file to resume."
+    )
+    batch.set_defaults(func=cmd_batch)
+
+    bench = subparsers.add_parser("bench", parents=[workflow_args], help="Measure request latency.")
+    bench.add_argument(
+        "request", nargs="?", help="Procurement request text (demo task if omitted)."
+    )
+    bench.add_argument("--repeat", type=positive_int, default=5)
+    bench.set_defaults(func=cmd_bench)
+
+    evaluate = subparsers.add_parser(
+        "eval",
+        parents=[workflow_args],
+        help="Compare configurations on labeled requests: accuracy vs latency, LM calls, tokens.",
+    )
+    evaluate.add_argument("--data-dir", default="mock_data")
+    evaluate.add_argument("--configs", help="JSON file mapping config name to overrides.")
+    evaluate.add_argument("--threads", type=int, default=8)
+    evaluate.add_argument("--min-accuracy", type=float, default=0.8)
+    evaluate.set_defaults(func=cmd_eval)
+
+    serve = subparsers.add_parser(
+        "serve", parents=[workflow_args], help="Serve the workflow over HTTP from a worker pool."
+    )
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8080)
+    serve.add_argument("--workers", type=positive_int, default=2)
+    serve.add_argument(
+        "--threads", type=positive_int, default=4, help="Concurrent requests per worker."
+    )
+    serve.add_argument("--queue-size", type=int, default=32)
+    serve.add_argument("--timeout", type=float, default=60.0, help="Default per-request timeout.")
+    serve.add_argument("--micro-batch-size", type=int, default=16)
+    serve.add_argument("--micro-batch-wait-ms", type=float, default=5.0)
+    serve.set_defaults(func=cmd_serve)
+
+    prewarm = subparsers.add_parser(
+        "prewarm-compliance",
+        parents=[workflow_args],
+        help="Check every stored contract against the current rules and cache the verdicts.",
+    )
+    prewarm.set_defaults(func=cmd_prewarm_compliance)
+
+    precompute = subparsers.add_parser(
+        "precompute-risk",
+        parents=[workflow_args],
+        help="Batch-score every supplier against its audits and save the risk profiles.",
+    )
+    precompute.add_argument("--output", default="artifacts/risk_profiles.json")
+    precompute.add_argument(
+        "--max-batch-tokens", type=int, default=6000, help="Prompt budget per batched LM call."
+    )
+    precompute.set_defaults(func=cmd_precompute_risk)
+
+    refine_stats = subparsers.add_parser(
+        "refine-stats", help="Show Refine pass rates, chosen N and LM calls saved per stage."
+    )
+    refine_stats.add_argument("stats", nargs="?", default="artifacts/refine_stats.sqlite")
+    refine_stats.set_defaults(func=cmd_refine_stats)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
 
 
 if __name__ == "__main__":
-    main()
+    main(sys.argv[1:])
@@ -21,3 +21,14 @@ def reward_compliance_schema(inputs: dict[str, Any], pred) -> float:
     if not isinstance(pred.rejection_reason, str):
         return -1.0
     return 1.0
+
+
+# Reward: every requested (contract, rule) pair has a verdict, so all of them can be cached.
+def reward_rule_verdicts(inputs: dict[str, Any], pred) -> float:
+    expected = {
+        (c, r)
+        for c in range(1, len(inputs["contracts"]) + 1)
+        for r in range(1, len(inputs["rules"]) + 1)
+    }
+    returned = {(v.contract, v.rule) for v in pred.verdicts or []}
+    return 1.0 if expected <= returned else -1.0
@@ -1,7 +1,7 @@
 # modules/risk_mining.py
 import dspy
 
-from modules.signatures import RiskMiningSignature
+from modules.signatures import BatchRiskMiningSignature, RiskMiningSignature
 
 
 class RiskMiner(dspy.Module):
@@ -15,3 +15,67 @@ class RiskMiner(dspy.Module):
             supplier_info=supplier_info,
             audit_context=audit_context,
         )
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token is close enough for budgeting prompt size.
+    return len(text) // 4 + 1
+
+
+def format_supplier_block(supplier: dict) -> str:
+    return (
+        f"supplier_id: {supplier['supplier_id']}\n"
+        f"profile: {supplier['supplier_info']}\n"
+        f"audit: {supplier['audit_context']}"
+    )
+
+
+# Assesses many suppliers per LM call instead of one RiskMiner call each.
+class BatchRiskMiner(dspy.Module):
+    def __init__(self, max_batch_tokens: int = 6000):
+        super().__init__()
+        self.max_batch_tokens = max_batch_tokens
+        self.miner = dspy.ChainOfThought(BatchRiskMiningSignature)
+
+    def chunk(self, suppliers: list[dict]) -> list[list[dict]]:
+        """Split suppliers into batches whose prompt text stays within max_batch_tokens."""
+        chunks, current, current_tokens = [], [], 0
+        for supplier in suppliers:
+            tokens = estimate_tokens(format_supplier_block(supplier))
+            if current and current_tokens + tokens > self.max_batch_tokens:
+                chunks.append(current)
+                current, current_tokens = [], 0
+            current.append(supplier)
+            current_tokens += tokens
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def assess(self, suppliers: list[dict]) -> dict[str, dict]:
+        blocks = "\n\n".join(format_supplier_block(s) for s in suppliers)
+        wanted = {s["supplier_id"] for s in suppliers}
+        assessed = {}
+        for item in self.miner(suppliers=blocks).assessments:
+            # Ignore IDs the LM invented or repeated.
+            if item.supplier_id in wanted and item.supplier_id not in assessed:
+                assessed[item.supplier_id] = {
+                    "risk_score": item.risk_score,
+                    "risk_summary": item.risk_summary,
+                }
+        return assessed
+
+    def forward(self, suppliers: list[dict]):
+        """
+        suppliers: dicts with supplier_id, supplier_info and audit_context.
+        Returns a Prediction whose assessments map supplier_id to risk_score/risk_summary.
+        Suppliers the LM skipped are retried once in a single follow-up batch.
+        """
+        assessments = {}
+        for chunk in self.chunk(suppliers):
+            assessments.update(self.assess(chunk))
+
+        missing = [s for s in suppliers if s["supplier_id"] not in assessments]
+        for chunk in self.chunk(missing):
+            assessments.update(self.assess(chunk))
+
+        return dspy.Prediction(assessments=assessments)
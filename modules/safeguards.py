@@ -1,7 +1,9 @@
 # modules/safeguards.py
+import re
+
 import dspy
 
-from modules.signatures import ComplianceSignature
+from modules.signatures import ComplianceSignature, RuleComplianceSignature
 
 
 class ContractComplianceChecker(dspy.Module):
@@ -14,3 +16,51 @@ class ContractComplianceChecker(dspy.Module):
             draft_terms=draft_terms,
             compliance_rules=compliance_rules,
         )
+
+
+# Checks several contracts against several rules in one call, one verdict per pair, so the
+# verdicts can be cached per (contract, rule).
+class RuleComplianceChecker(dspy.Module):
+    def __init__(self):
+        super().__init__()
+        self.check = dspy.Predict(RuleComplianceSignature)
+
+    def forward(self, contracts: list[str], rules: list[str]):
+        return self.check(
+            contracts="\n\n".join(f"Contract {i}:\n{c}" for i, c in enumerate(contracts, start=1)),
+            compliance_rules="\n".join(f"Rule {i}: {r}" for i, r in enumerate(rules, start=1)),
+        )
+
+
+BUDGET_VALUE_PATTERN = re.compile(r"(\d[\d,]*(?:\.\d+)?)\s*([km])?\b", re.IGNORECASE)
+NET_90_PATTERN = re.compile(r"Net\s*90\b", re.IGNORECASE)
+
+
+def parse_budget_upper_bound(budget: str) -> float | None:
+    """Largest amount in a budget string such as '40k-60k USD' or '$50,000'."""
+    values = []
+    for number, suffix in BUDGET_VALUE_PATTERN.findall(budget or ""):
+        value = float(number.replace(",", ""))
+        multiplier = {"k": 1_000, "m": 1_000_000}.get(suffix.lower(), 1)
+        values.append(value * multiplier)
+    return max(values) if values else None
+
+
+# Deterministic fallback for COMPLIANCE_RULES when there is no time left for the LM check.
+# Rule 2 certifies the supplier, so it is checked against the selected supplier's profile.
+# Rule 3 (budget overrun) needs the final price, so it cannot be checked here.
+def rule_only_compliance(
+    contracts: list[str], supplier_profile: str, item_category: str, estimated_budget: str
+):
+    reasons = []
+    budget = parse_budget_upper_bound(estimated_budget)
+    if budget is not None and budget > 50_000:
+        if any(not NET_90_PATTERN.search(contract) for contract in contracts):
+            reasons.append("Rule 1: contract over $50,000 without a 90-day payment term.")
+
+    category = (item_category or "").lower()
+    if re.search(r"\bit\b", category) or "hardware" in category:
+        if "ISO 27001" not in supplier_profile:
+            reasons.append("Rule 2: IT hardware supplier without ISO 27001 certification.")
+
+    return dspy.Prediction(is_compliant=not reasons, rejection_reason=" ".join(reasons))
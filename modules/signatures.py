@@ -1,4 +1,5 @@
 import dspy
+from pydantic import BaseModel
 
 
 class RequirementSpecSignature(dspy.Signature):
@@ -59,6 +60,28 @@ class RiskMiningSignature(dspy.Signature):
     )
 
 
+class SupplierRisk(BaseModel):
+    supplier_id: str
+    risk_score: int
+    risk_summary: str
+
+
+class BatchRiskMiningSignature(dspy.Signature):
+    suppliers: str = dspy.InputField(
+        desc=(
+            "Several suppliers, each introduced by a 'supplier_id:' line followed by its profile "
+            "and audit excerpt."
+        )
+    )
+
+    assessments: list[SupplierRisk] = dspy.OutputField(
+        desc=(
+            "One entry per supplier_id in the input: a 0–100 risk score and a short summary "
+            "of its risk factors. Assess each supplier only from its own profile and audit."
+        )
+    )
+
+
 class ComplianceSignature(dspy.Signature):
     draft_terms: str = dspy.InputField(
         desc="Proposed contract terms produced automatically by the system."
@@ -73,3 +96,26 @@ class ComplianceSignature(dspy.Signature):
     rejection_reason: str = dspy.OutputField(
         desc="If not compliant, explanation of which rule(s) were violated."
     )
+
+
+class RuleVerdict(BaseModel):
+    contract: int
+    rule: int
+    is_compliant: bool
+    reason: str
+
+
+class RuleComplianceSignature(dspy.Signature):
+    contracts: str = dspy.InputField(
+        desc="Numbered contracts, each introduced by a 'Contract <n>:' line."
+    )
+    compliance_rules: str = dspy.InputField(
+        desc="Numbered compliance rules, each introduced by a 'Rule <n>:' line."
+    )
+
+    verdicts: list[RuleVerdict] = dspy.OutputField(
+        desc=(
+            "One entry for every contract and rule pair, using the numbers from the input. "
+            "reason explains the violation when is_compliant is false, otherwise it is empty."
+        )
+    )
@@ -1,27 +1,230 @@
 # pipeline.py
+import time
+
 import dspy
 
 from config.business_rules import COMPLIANCE_RULES
 from modules.analysis import RequirementAnalyzer
 from modules.ranking import SupplierRankerModule
-from modules.refinement import reward_budget_present, reward_compliance_schema
-from modules.risk_mining import RiskMiner
-from modules.safeguards import ContractComplianceChecker
+from modules.refinement import (
+    reward_budget_present,
+    reward_compliance_schema,
+    reward_rule_verdicts,
+)
+from modules.risk_mining import BatchRiskMiner, RiskMiner
+from modules.safeguards import (
+    ContractComplianceChecker,
+    RuleComplianceChecker,
+    rule_only_compliance,
+)
+from runtime.adaptive_refine import request_features
+from runtime.checkpoints import inputs_hash
+from runtime.compliance_store import cached_compliance_verdict
+from runtime.deadline import DeadlineScheduler, StageTimings
+from runtime.risk_profiles import SUPPLIER_ID_PATTERN
+
+# Refine settings per stage. Kept on the workflow so a compiled program can persist its choice.
+DEFAULT_REFINE_CONFIG = {
+    "requirement": {"N": 4, "threshold": 0.0},
+    "compliance": {"N": 4, "threshold": 0.0},
+}
 
 
 # Orchestrates supplier selection, contract checks, and compliance refinement in one DSPy workflow.
 class ProcurementWorkflow(dspy.Module):
-    def __init__(self, supplier_r, contract_r, audit_r):
+    def __init__(
+        self,
+        supplier_r,
+        contract_r,
+        audit_r,
+        cache=None,
+        verdict_store=None,
+        checkpoints=None,
+        singleflight=None,
+        shortlist_risk=False,
+        refine_controller=None,
+    ):
         super().__init__()
         self.supplier_r = supplier_r
         self.contract_r = contract_r
         self.audit_r = audit_r
+        # Optional SemanticCache: near-duplicate requests are answered from a prior decision.
+        self.cache = cache
+        # Optional ComplianceVerdictStore: per-(contract, rule) verdicts shared across processes.
+        self.verdict_store = verdict_store
+        # Optional CheckpointStore: stage outputs per request_id, so interrupted batches resume.
+        self.checkpoints = checkpoints
+        # Optional SingleFlight: concurrent requests with identical stage inputs share one LM call.
+        self.singleflight = singleflight
         self.analyzer = RequirementAnalyzer()
         self.ranker = SupplierRankerModule()
         self.risk_miner = RiskMiner()
+        # With shortlist_risk, every retrieved supplier is risk-scored in one batched call
+        # before ranking, and the winner's score is reused instead of a separate RiskMiner call.
+        self.shortlist_risk = shortlist_risk
+        self.batch_risk_miner = BatchRiskMiner()
         self.compliance = ContractComplianceChecker()
+        self.rule_compliance = RuleComplianceChecker()
+        self.refine_config = {stage: dict(cfg) for stage, cfg in DEFAULT_REFINE_CONFIG.items()}
+        # Optional AdaptiveRefineController: refine_config N becomes a cap, and the attempts
+        # actually run are chosen from observed reward statistics.
+        self.refine_controller = refine_controller
+        # Last known risk profile per supplier, used when the deadline leaves no time for RiskMiner.
+        self.risk_profiles: dict[str, dict] = {}
+        # Observed stage latencies, used to plan each request's time budget.
+        self.stage_timings = StageTimings()
+
+    def forward(
+        self, raw_request: str, request_id: str | None = None, deadline: float | None = None
+    ):
+        """
+        deadline is an absolute time.time() value. As it approaches, stages degrade in order:
+        fewer Refine candidates, a precomputed risk profile instead of RiskMiner, and finally
+        rule-only compliance. The applied degradations are listed in the result.
+        """
+        scheduler = DeadlineScheduler(deadline, self.stage_timings)
+        if self.cache is None:
+            return self.run_stages(raw_request, request_id, scheduler)
+
+        # Embed once and reuse the vector for both the lookup and the store.
+        vector = self.cache.embed_fn(raw_request)
+        cached = self.cache.lookup(raw_request, vector=vector)
+        if cached is not None:
+            return cached
+
+        result = self.run_stages(raw_request, request_id, scheduler)
+        # A degraded answer is only good enough for this deadline; don't serve it to others.
+        if not scheduler.degradations:
+            self.cache.store(raw_request, result, vector=vector)
+        return result
+
+    def refine(self, stage: str, module, reward_fn, n: int, **inputs):
+        """Run module under dspy.Refine with up to n attempts (fewer if a controller adapts N)."""
+        threshold = self.refine_config[stage]["threshold"]
+        if self.refine_controller is None:
+            return dspy.Refine(module=module, N=n, reward_fn=reward_fn, threshold=threshold)(
+                **inputs
+            )
+        features = request_features(stage, inputs, reward_fn)
+        return self.refine_controller.run(stage, features, module, reward_fn, n, threshold, inputs)
+
+    def check_compliance(self, draft_terms: str, compliance_rules: str, n: int | None = None):
+        return self.refine(
+            "compliance",
+            self.compliance,
+            reward_compliance_schema,
+            n or self.refine_config["compliance"]["N"],
+            draft_terms=draft_terms,
+            compliance_rules=compliance_rules,
+        )
+
+    def run_stage(
+        self, request_id, stage: str, inputs, compute, scheduler=None, attempts: int = 1
+    ) -> dspy.Prediction:
+        """
+        Run one stage: reuse this request's checkpoint for identical inputs if there is one,
+        otherwise compute it, sharing the call with any concurrent request on the same inputs.
+        """
+        if scheduler is not None:
+            run = compute
+
+            # Only real executions update the latency estimates, not checkpoint reuse.
+            def compute():
+                started = time.time()
+                output = run()
+                scheduler.timed(stage, started, attempts)
+                return output
+
+        key = inputs_hash(inputs)
+        use_checkpoints = self.checkpoints is not None and request_id is not None
+        if use_checkpoints:
+            saved = self.checkpoints.get(request_id, stage, key)
+            if saved is not None:
+                return dspy.Prediction(**saved)
+
+        if self.singleflight is not None:
+            output = self.singleflight.do(f"{stage}:{key}", compute)
+        else:
+            output = compute()
+
+        if use_checkpoints:
+            self.checkpoints.append(request_id, stage, key, output.toDict())
+        return output
+
+    def assess_shortlist(self, request_id, supplier_ctx_list, scheduler) -> dict[str, dict]:
+        """Risk-score every retrieved supplier in one batched call (when shortlist_risk is on)."""
+        if not self.shortlist_risk:
+            return {}
+        if not scheduler.can_afford("shortlist_risk", after=("ranking", "compliance")):
+            scheduler.degrade("shortlist_risk_skipped")
+            return {}
+
+        suppliers = {}
+        for ctx in supplier_ctx_list:
+            match = SUPPLIER_ID_PATTERN.search(ctx)
+            if match and match.group() not in suppliers:
+                suppliers[match.group()] = ctx
+        if not suppliers:
+            return {}
 
-    def forward(self, raw_request: str):
+        def mine_shortlist():
+            entries = [
+                {
+                    "supplier_id": supplier_id,
+                    "supplier_info": info,
+                    "audit_context": next(iter(self.audit_r(supplier_id).context), ""),
+                }
+                for supplier_id, info in suppliers.items()
+            ]
+            return self.batch_risk_miner(suppliers=entries)
+
+        assessed = self.run_stage(
+            request_id,
+            "shortlist_risk",
+            {"suppliers": suppliers},
+            mine_shortlist,
+            scheduler,
+        ).assessments
+        self.risk_profiles.update(assessed)
+        return assessed
+
+    def check_rules(
+        self, contracts: list[str], rules: list[str], n: int | None = None
+    ) -> dict[tuple[int, int], tuple[bool, str]]:
+        """
+        Verdict per (contract index, rule index) from one Refine call over all pairs.
+        Pairs the LM still leaves out are checked one by one.
+        """
+        result = self.refine(
+            "compliance",
+            self.rule_compliance,
+            reward_rule_verdicts,
+            n or self.refine_config["compliance"]["N"],
+            contracts=contracts,
+            rules=rules,
+        )
+        verdicts = {}
+        for v in result.verdicts or []:
+            pair = (v.contract - 1, v.rule - 1)
+            if pair[0] in range(len(contracts)) and pair[1] in range(len(rules)):
+                verdicts.setdefault(pair, (bool(v.is_compliant), str(v.reason or "")))
+
+        for c, contract in enumerate(contracts):
+            for r, rule in enumerate(rules):
+                if (c, r) not in verdicts:
+                    single = self.check_compliance(contract, rule, n=n)
+                    verdicts[(c, r)] = (
+                        bool(single.is_compliant),
+                        str(single.rejection_reason or ""),
+                    )
+        return verdicts
+
+    def run_stages(
+        self,
+        raw_request: str,
+        request_id: str | None = None,
+        scheduler: DeadlineScheduler | None = None,
+    ):
         """
         Complete procurement workflow:
         1) Requirement refinement
@@ -31,20 +234,39 @@ class ProcurementWorkflow(dspy.Module):
         5) Audit RAG + Risk Mining
         6) Compliance refinement
         7) Final approval decision
+
+        With a checkpoint store and a request_id, every stage output is recorded together with
+        a hash of its inputs; rerunning the same request skips the stages already recorded.
         """
+        scheduler = scheduler or DeadlineScheduler(None, self.stage_timings)
 
         # ------------------------------------------------------
         # Step 1 — Refine Requirement Specification
         # ------------------------------------------------------
-        # We run 4 candidates and choose best one based on reward_budget_present
-        refined_spec = dspy.Refine(
-            module=self.analyzer,
-            N=4,
-            reward_fn=reward_budget_present,
-            threshold=0.0,
-        )(raw_request=raw_request, feedback="none")
-
-        spec = refined_spec  # Prediction object
+        # We run N candidates (4 by default) and choose best one based on reward_budget_present
+        # Under a deadline, N shrinks to what fits after reserving time for the later stages.
+        requirement_cfg = self.refine_config["requirement"]
+        requirement_n = scheduler.attempts(
+            "requirement",
+            requirement_cfg["N"],
+            after=("retrieval", "ranking", "risk", "compliance"),
+        )
+        spec = self.run_stage(
+            request_id,
+            "requirement",
+            {"raw_request": raw_request, "refine": {**requirement_cfg, "N": requirement_n}},
+            lambda: self.refine(
+                "requirement",
+                self.analyzer,
+                reward_budget_present,
+                requirement_n,
+                raw_request=raw_request,
+                feedback="none",
+            ),
+            scheduler,
+            attempts=requirement_n,
+        )
+
         # Convert the DSPy prediction to a JSON-serializable dict so downstream modules can access fields.
         spec_json = spec.toDict()
 
@@ -56,16 +278,31 @@ class ProcurementWorkflow(dspy.Module):
         print("----------------------------------")
         print("RAG Query:", rag_query)
         print("----------------------------------")
-        supplier_ctx_list = self.supplier_r(rag_query).context
-        # Merge multiple supplier hits into a single prompt-friendly blob.
-        supplier_ctx = "\n".join(supplier_ctx_list)
 
         # ------------------------------------------------------
         # Step 3 — Contract RAG
         # Contract context is REQUIRED by SupplierRankSignature
         # So contract RAG must come BEFORE ranking
         # ------------------------------------------------------
-        contract_ctx_list = self.contract_r(rag_query).context
+        retrieved = self.run_stage(
+            request_id,
+            "retrieval",
+            {"rag_query": rag_query},
+            lambda: dspy.Prediction(
+                supplier_context=list(self.supplier_r(rag_query).context),
+                contract_context=list(self.contract_r(rag_query).context),
+            ),
+            scheduler,
+        )
+        supplier_ctx_list = retrieved.supplier_context
+        contract_ctx_list = retrieved.contract_context
+        shortlist_risk = self.assess_shortlist(request_id, supplier_ctx_list, scheduler)
+        if shortlist_risk:
+            supplier_ctx_list = [
+                annotate_with_risk(ctx, shortlist_risk) for ctx in supplier_ctx_list
+            ]
+        # Merge multiple supplier hits into a single prompt-friendly blob.
+        supplier_ctx = "\n".join(supplier_ctx_list)
         # Keep the contract context as a multiline string so ranking and compliance can reference clauses.
         contract_ctx = "\n".join(contract_ctx_list)
 
@@ -76,10 +313,16 @@ class ProcurementWorkflow(dspy.Module):
         #   - supplier_context
         #   - contract_context
         # ------------------------------------------------------
-        ranked = self.ranker(
-            specification=spec_json,
-            supplier_context=supplier_ctx,
-            contract_context=contract_ctx,
+        ranked = self.run_stage(
+            request_id,
+            "ranking",
+            {"spec": spec_json, "suppliers": supplier_ctx, "contracts": contract_ctx},
+            lambda: self.ranker(
+                specification=spec_json,
+                supplier_context=supplier_ctx,
+                contract_context=contract_ctx,
+            ),
+            scheduler,
         )
 
         supplier_id = ranked.top_supplier_id
@@ -89,45 +332,123 @@ class ProcurementWorkflow(dspy.Module):
         # RiskMiningSignature requires:
         #   supplier_id, supplier_info, audit_context
         # ------------------------------------------------------
-        supplier_info = self.supplier_r(supplier_id).context[0]
-        audit_info = self.audit_r(supplier_id).context[0]
+        def mine_risk():
+            supplier_info = self.supplier_r(supplier_id).context[0]
+            audit_info = self.audit_r(supplier_id).context[0]
 
-        risk = self.risk_miner(
-            supplier_id=supplier_id,
-            supplier_info=supplier_info,
-            audit_context=audit_info,
-        )
+            return self.risk_miner(
+                supplier_id=supplier_id,
+                supplier_info=supplier_info,
+                audit_context=audit_info,
+            )
+
+        # Keep time for at least one compliance attempt; otherwise fall back to the last known profile.
+        if supplier_id in shortlist_risk:
+            risk = dspy.Prediction(**shortlist_risk[supplier_id])
+        elif scheduler.can_afford("risk", after=("compliance",)):
+            risk = self.run_stage(
+                request_id, "risk", {"supplier_id": supplier_id}, mine_risk, scheduler
+            )
+            self.risk_profiles[supplier_id] = {
+                "risk_score": risk.risk_score,
+                "risk_summary": risk.risk_summary,
+            }
+        elif supplier_id in self.risk_profiles:
+            scheduler.degrade("risk_precomputed")
+            risk = dspy.Prediction(**self.risk_profiles[supplier_id])
+        else:
+            scheduler.degrade("risk_unavailable")
+            risk = dspy.Prediction(
+                risk_score=None, risk_summary="Risk not assessed within the deadline."
+            )
 
         # ------------------------------------------------------
         # Step 6 — Compliance Refinement
         # Use Refine to enforce schema correctness & compliance rules
+        # With a verdict store, verdicts are cached per (contract, rule); the pairs not yet
+        # cached are checked together in one call, so only unseen contracts or edited rules
+        # reach the LM.
         # ------------------------------------------------------
         draft_terms = contract_ctx
 
-        compliance = dspy.Refine(
-            module=self.compliance,
-            N=4,
-            reward_fn=reward_compliance_schema,
-            threshold=0.0,
-        )(
-            draft_terms=draft_terms,
-            compliance_rules=COMPLIANCE_RULES,
-        )
+        compliance_cfg = self.refine_config["compliance"]
+
+        def check():
+            if self.verdict_store is None:
+                return self.check_compliance(draft_terms, COMPLIANCE_RULES, n=compliance_n)
+
+            is_compliant, rejection_reason = cached_compliance_verdict(
+                self.verdict_store,
+                contract_ctx_list or [draft_terms],
+                COMPLIANCE_RULES,
+                lambda contracts, rules: self.check_rules(contracts, rules, n=compliance_n),
+            )
+            return dspy.Prediction(is_compliant=is_compliant, rejection_reason=rejection_reason)
+
+        if scheduler.can_afford("compliance"):
+            compliance_n = scheduler.attempts("compliance", compliance_cfg["N"])
+            compliance = self.run_stage(
+                request_id,
+                "compliance",
+                {
+                    "draft_terms": draft_terms,
+                    "rules": COMPLIANCE_RULES,
+                    "refine": {**compliance_cfg, "N": compliance_n},
+                },
+                check,
+                scheduler,
+                attempts=compliance_n,
+            )
+        else:
+            scheduler.degrade("compliance_rule_only")
+            supplier_profile = next(
+                (
+                    ctx
+                    for ctx in supplier_ctx_list
+                    if supplier_id in SUPPLIER_ID_PATTERN.findall(ctx)
+                ),
+                "",
+            )
+            compliance = rule_only_compliance(
+                contract_ctx_list or [draft_terms],
+                supplier_profile,
+                spec.item_category,
+                spec.estimated_budget,
+            )
 
         # ------------------------------------------------------
         # Step 7 — Make decision
         # ------------------------------------------------------
         if not compliance.is_compliant:
-            return {
+            decision = {
                 "status": "REQUIRES_REVIEW",
                 "reason": compliance.rejection_reason,
                 "supplier": supplier_id,
+                "item_category": spec.item_category,
                 "risk_score": risk.risk_score,
             }
+        else:
+            decision = {
+                "status": "APPROVED",
+                "supplier": supplier_id,
+                "item_category": spec.item_category,
+                "risk_summary": risk.risk_summary,
+                "risk_score": risk.risk_score,
+            }
+
+        if scheduler.deadline is not None:
+            decision["degradations"] = list(scheduler.degradations)
+
+        # Recorded last, so a request with a "decision" checkpoint is fully done.
+        # Degraded answers are not recorded, so a resumed run still computes the full result.
+        if not scheduler.degradations:
+            self.run_stage(request_id, "decision", decision, lambda: dspy.Prediction(**decision))
+        return decision
+
 
-        return {
-            "status": "APPROVED",
-            "supplier": supplier_id,
-            "risk_summary": risk.risk_summary,
-            "risk_score": risk.risk_score,
-        }
+def annotate_with_risk(supplier_ctx: str, assessments: dict[str, dict]) -> str:
+    match = SUPPLIER_ID_PATTERN.search(supplier_ctx)
+    if not match or match.group() not in assessments:
+        return supplier_ctx
+    risk = assessments[match.group()]
+    return f"{supplier_ctx}\nRisk score: {risk['risk_score']}/100. {risk['risk_summary']}"
@@ -0,0 +1,288 @@
+# runtime/adaptive_refine.py
+# Chooses the Refine attempt budget per stage from observed rewards, so retries are only spent
+# on the stages and request types where later attempts historically turned a failure into a pass.
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+import dspy
+
+from runtime.compliance_store import split_compliance_rules
+
+# Single-shot runs sample at one of these; dspy.Refine always samples at 1.0.
+TEMPERATURES = (0.0, 0.7, 1.0)
+REFINE_TEMPERATURE = 1.0
+
+BUDGET_HINT_PATTERN = re.compile(
+    r"[$€£]\s*\d|\d[\d,.]*\s*(?:k|m|usd|eur|dollars?)\b|\bbudget\b", re.IGNORECASE
+)
+
+
+def request_features(stage: str, inputs: dict[str, Any], reward_fn: Callable) -> str:
+    """
+    Coarse request features that change how often the first candidate passes. The reward function
+    is part of the key because modules of one stage (e.g. single and batched compliance checks)
+    are scored differently, so their pass rates must not be mixed.
+    """
+    if stage == "requirement":
+        has_budget = BUDGET_HINT_PATTERN.search(inputs.get("raw_request", ""))
+        features = f"budget={'yes' if has_budget else 'no'}"
+    elif stage == "compliance":
+        rules = inputs.get("rules") or split_compliance_rules(inputs.get("compliance_rules", ""))
+        features = f"rules={'one' if len(rules) <= 1 else 'all'}"
+    else:
+        features = "default"
+    return f"{features},reward={reward_fn.__name__}"
+
+
+@dataclass
+class RefineRun:
+    n: int
+    max_n: int
+    temperature: float
+    rewards: list[float]
+    passed_at: Optional[int]
+
+    @property
+    def lm_calls(self) -> int:
+        # Refine asks the LM for feedback after every failed attempt except the last.
+        return 2 * len(self.rewards) - 1 if self.rewards else 0
+
+
+# Rolling per-(stage, features) reward statistics, persisted in SQLite and shared across restarts.
+class AdaptiveRefineController:
+    def __init__(
+        self,
+        path: Union[str, Path] = "artifacts/refine_stats.sqlite",
+        window: int = 500,
+        min_samples: int = 20,
+        min_gain: float = 0.02,
+        explore_every: int = 10,
+    ):
+        """
+        N is the smallest attempt count whose pass rate is within min_gain of the full budget.
+        Until a key has min_samples runs, and on every explore_every-th request afterwards, the
+        full configured N runs so the pass rates of later attempts stay measured.
+        """
+        self.window = window
+        self.min_samples = min_samples
+        self.min_gain = min_gain
+        self.explore_every = explore_every
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._runs: dict[tuple[str, str], deque[RefineRun]] = {}
+        self._requests: dict[tuple[str, str], int] = {}
+        # Runs of this process only, so per-worker totals can be summed without double counting.
+        self._totals: dict[str, dict[str, float]] = {}
+        self._conn = sqlite3.connect(self.path, timeout=30.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS refine_runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                stage TEXT NOT NULL,
+                features TEXT NOT NULL,
+                n INTEGER NOT NULL,
+                max_n INTEGER NOT NULL,
+                temperature REAL NOT NULL,
+                rewards TEXT NOT NULL,
+                passed_at INTEGER,
+                created_at REAL NOT NULL
+            )
+            """)
+        self._conn.commit()
+        self._load()
+
+    def _load(self) -> None:
+        rows = self._conn.execute(
+            "SELECT stage, features, n, max_n, temperature, rewards, passed_at "
+            "FROM refine_runs ORDER BY id"
+        )
+        for stage, features, n, max_n, temperature, rewards, passed_at in rows:
+            self._window(stage, features).append(
+                RefineRun(n, max_n, temperature, json.loads(rewards), passed_at)
+            )
+
+    def _window(self, stage: str, features: str) -> deque[RefineRun]:
+        return self._runs.setdefault((stage, features), deque(maxlen=self.window))
+
+    def pass_rates(self, runs, max_n: int) -> list[Optional[float]]:
+        """Share of runs that passed within k attempts, for k = 1..max_n (None if unmeasured)."""
+        rates = []
+        for k in range(1, max_n + 1):
+            # Only runs allowed at least k attempts measure budget k: counting the passes of
+            # smaller budgets but not their failures would overstate later attempts.
+            eligible = [r for r in runs if r.n >= k]
+            passed = sum(1 for r in eligible if r.passed_at is not None and r.passed_at <= k)
+            rates.append(passed / len(eligible) if len(eligible) >= self.min_samples else None)
+        return rates
+
+    def _decide(self, runs, max_n: int) -> tuple[int, Optional[float]]:
+        rates = self.pass_rates(runs, max_n)
+        if rates[-1] is None:
+            return max_n, None
+        n = next(
+            k
+            for k, rate in enumerate(rates, start=1)
+            if rate is not None and rate >= rates[-1] - self.min_gain
+        )
+        return n, self._temperature(runs) if n == 1 else None
+
+    def _temperature(self, runs) -> float:
+        """Temperature with the best first-attempt pass rate; untried ones are sampled first."""
+        best, best_rate = REFINE_TEMPERATURE, -1.0
+        for temperature in TEMPERATURES:
+            firsts = [r for r in runs if r.temperature == temperature and r.rewards]
+            if len(firsts) < self.min_samples:
+                return temperature
+            rate = sum(1 for r in firsts if r.passed_at == 1) / len(firsts)
+            if rate > best_rate:
+                best, best_rate = temperature, rate
+        return best
+
+    def choose(self, stage: str, features: str, max_n: int) -> tuple[int, Optional[float]]:
+        """Attempt count and single-shot temperature (None means run dspy.Refine)."""
+        with self._lock:
+            key = (stage, features)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            runs = self._window(stage, features)
+            if len(runs) < self.min_samples or self._requests[key] % self.explore_every == 0:
+                return max_n, None
+            return self._decide(runs, max_n)
+
+    def observe(
+        self,
+        stage: str,
+        features: str,
+        n: int,
+        max_n: int,
+        temperature: float,
+        rewards: list[float],
+        threshold: float,
+    ) -> None:
+        passed_at = next((i for i, r in enumerate(rewards, start=1) if r >= threshold), None)
+        run = RefineRun(n, max_n, temperature, list(rewards), passed_at)
+        with self._lock:
+            window = self._window(stage, features)
+            saved = 2 * self._expected_extra_attempts(run, self.pass_rates(window, max_n))
+            totals = self._totals.setdefault(
+                stage, {"runs": 0, "lm_calls": 0, "lm_calls_saved": 0.0}
+            )
+            totals["runs"] += 1
+            totals["lm_calls"] += run.lm_calls
+            totals["lm_calls_saved"] += saved
+            window.append(run)
+            self._conn.execute(
+                "INSERT INTO refine_runs "
+                "(stage, features, n, max_n, temperature, rewards, passed_at, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    stage,
+                    features,
+                    n,
+                    max_n,
+                    temperature,
+                    json.dumps(rewards),
+                    passed_at,
+                    time.time(),
+                ),
+            )
+            self._conn.commit()
+
+    def run(
+        self,
+        stage: str,
+        features: str,
+        module,
+        reward_fn: Callable,
+        max_n: int,
+        threshold: float,
+        inputs: dict[str, Any],
+    ):
+        """Run one Refine stage with an adaptive budget and record its rewards."""
+        n, temperature = self.choose(stage, features, max_n)
+        rewards = []
+
+        def recorded_reward(args, pred):
+            reward = reward_fn(args, pred)
+            rewards.append(reward)
+            return reward
+
+        if temperature is not None:
+            lm = module.get_lm() or dspy.settings.lm
+            with dspy.context(lm=lm.copy(temperature=temperature)):
+                prediction = module(**inputs)
+            recorded_reward(inputs, prediction)
+        else:
+            prediction = dspy.Refine(
+                module=module, N=n, reward_fn=recorded_reward, threshold=threshold
+            )(**inputs)
+            temperature = REFINE_TEMPERATURE
+
+        self.observe(stage, features, n, max_n, temperature, rewards, threshold)
+        return prediction
+
+    def _expected_extra_attempts(self, run: RefineRun, rates: list[Optional[float]]) -> float:
+        """Attempts the full budget would have added after a run that failed within a smaller N."""
+        used = len(run.rewards)
+        if run.passed_at is not None or used >= run.max_n or rates[used - 1] in (None, 1.0):
+            return 0.0
+        fail_so_far = 1 - rates[used - 1]
+        extra = 0.0
+        for k in range(used, run.max_n):
+            if rates[k - 1] is None:
+                break
+            extra += (1 - rates[k - 1]) / fail_so_far
+        return extra
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """
+        Per stage: runs, LM calls made, and the LM calls saved versus always running the
+        configured N (estimated from the observed pass rates), over the rolling window.
+        """
+        report: dict[str, dict[str, Any]] = {}
+        with self._lock:
+            windows = {key: list(runs) for key, runs in self._runs.items()}
+
+        for (stage, features), runs in windows.items():
+            if not runs:
+                continue
+            max_n = max(r.max_n for r in runs)
+            rates = self.pass_rates(runs, max_n)
+            calls = sum(r.lm_calls for r in runs)
+            # Each skipped attempt also skips the feedback call that would have preceded it.
+            saved = sum(2 * self._expected_extra_attempts(r, rates) for r in runs)
+            firsts = [r.rewards[0] for r in runs if r.rewards]
+            n, temperature = (
+                self._decide(runs, max_n) if len(runs) >= self.min_samples else (max_n, None)
+            )
+
+            entry = report.setdefault(stage, {"runs": 0, "lm_calls": 0, "lm_calls_saved": 0.0})
+            entry["runs"] += len(runs)
+            entry["lm_calls"] += calls
+            entry["lm_calls_saved"] = round(entry["lm_calls_saved"] + saved, 1)
+            entry.setdefault("features", {})[features] = {
+                "runs": len(runs),
+                "pass_rate_by_attempt": [None if r is None else round(r, 3) for r in rates],
+                "mean_first_reward": round(sum(firsts) / len(firsts), 3) if firsts else None,
+                "next_n": n,
+                "next_temperature": temperature,
+            }
+        return report
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Runs, LM calls and estimated LM calls saved per stage by this process."""
+        with self._lock:
+            return {
+                stage: {**totals, "lm_calls_saved": round(totals["lm_calls_saved"], 1)}
+                for stage, totals in self._totals.items()
+            }
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,86 @@
+# runtime/artifacts.py
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Union
+
+ARTIFACT_FORMAT_VERSION = 1
+
+
+def dump_workflow_state(workflow) -> dict[str, Any]:
+    """
+    Capture everything a compiled ProcurementWorkflow learned: per-predictor instructions,
+    signatures and demos, plus the Refine settings chosen for each stage.
+
+    Retrievers are deliberately left out; they are rebuilt from configuration at startup.
+    """
+    import dspy
+
+    return {
+        "format_version": ARTIFACT_FORMAT_VERSION,
+        "dspy_version": getattr(dspy, "__version__", "unknown"),
+        "created_at": time.time(),
+        "refine_config": workflow.refine_config,
+        "predictors": {name: p.dump_state() for name, p in workflow.named_predictors()},
+    }
+
+
+def apply_workflow_state(workflow, state: dict[str, Any]) -> None:
+    if state.get("format_version") != ARTIFACT_FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported artifact format {state.get('format_version')!r}; "
+            f"expected {ARTIFACT_FORMAT_VERSION}"
+        )
+
+    predictors = dict(workflow.named_predictors())
+    saved = state["predictors"]
+    unknown = set(saved) - set(predictors)
+    if unknown:
+        raise ValueError(
+            "Artifact does not match this workflow.\n"
+            f"Expected predictors: {sorted(predictors)}\n"
+            f"Unknown in artifact: {sorted(unknown)}"
+        )
+
+    # Predictors added to the workflow after the artifact was compiled keep their defaults.
+    for name, state_for_predictor in saved.items():
+        predictors[name].load_state(state_for_predictor)
+    workflow.refine_config = {stage: dict(cfg) for stage, cfg in state["refine_config"].items()}
+
+
+def save_workflow(workflow, path: Union[str, Path]) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump(dump_workflow_state(workflow), f, indent=2)
+    # Replace atomically so a worker never reads a half-written artifact.
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_workflow(workflow, path: Union[str, Path]):
+    with Path(path).open("r", encoding="utf-8") as f:
+        apply_workflow_state(workflow, json.load(f))
+    return workflow
+
+
+def warm_start(artifact_path: Union[str, Path], lm_model: str = "openai/gpt-4o", cache=None):
+    """
+    Build a ready-to-serve workflow: configure DSPy, load the compiled artifact and make sure
+    every retriever's collection is loaded in Milvus before the first request arrives.
+    """
+    from config.settings import configure_dspy
+    from pipeline import ProcurementWorkflow
+
+    started = time.perf_counter()
+    supplier_r, contract_r, audit_r = configure_dspy(lm_model=lm_model)
+    workflow = ProcurementWorkflow(supplier_r, contract_r, audit_r, cache=cache)
+    load_workflow(workflow, artifact_path)
+
+    for retriever in (supplier_r, contract_r, audit_r):
+        retriever.client.load_collection(retriever.collection)
+
+    print(f"Workflow warm-started in {time.perf_counter() - started:.3f}s")
+    return workflow
@@ -0,0 +1,71 @@
+# runtime/batching.py
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Optional
+
+
+# Groups concurrent single-item calls into one batched backend call (embedding, vector search).
+class MicroBatcher:
+    def __init__(
+        self,
+        batch_fn: Callable[[list[Any]], list[Any]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 5.0,
+    ):
+        """
+        batch_fn receives a list of items and must return one result per item, in order.
+        A batch is flushed as soon as it holds max_batch_size items or its oldest item has
+        waited max_wait_ms, so a lone request pays at most max_wait_ms of extra latency.
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._pending: list[tuple[Any, Future]] = []
+        self._cond = threading.Condition()
+        self._stats = {"items": 0, "batches": 0, "max_batch_size": 0}
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, item: Any, timeout: Optional[float] = None) -> Any:
+        future: Future = Future()
+        with self._cond:
+            self._pending.append((item, future))
+            self._cond.notify()
+        return future.result(timeout=timeout)
+
+    def stats(self) -> dict[str, int]:
+        with self._cond:
+            return dict(self._stats)
+
+    def _next_batch(self) -> list[tuple[Any, Future]]:
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            if len(self._pending) < self.max_batch_size:
+                # Give concurrent callers a short window to join this batch.
+                self._cond.wait_for(
+                    lambda: len(self._pending) >= self.max_batch_size,
+                    timeout=self.max_wait_ms / 1000.0,
+                )
+            batch = self._pending[: self.max_batch_size]
+            del self._pending[: self.max_batch_size]
+            self._stats["items"] += len(batch)
+            self._stats["batches"] += 1
+            self._stats["max_batch_size"] = max(self._stats["max_batch_size"], len(batch))
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            try:
+                results = self.batch_fn([item for item, _ in batch])
+                if len(results) != len(batch):
+                    raise ValueError(
+                        f"batch_fn returned {len(results)} results for {len(batch)} items"
+                    )
+            except Exception as exc:
+                for _, future in batch:
+                    future.set_exception(exc)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
@@ -0,0 +1,86 @@
+# runtime/checkpoints.py
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional, Union
+
+
+def inputs_hash(inputs: Any) -> str:
+    payload = json.dumps(inputs, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# Append-only record of every stage output per request, so a crashed batch resumes where it stopped.
+class CheckpointStore:
+    def __init__(self, path: Union[str, Path] = "artifacts/checkpoints.sqlite"):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                request_id TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                inputs_hash TEXT NOT NULL,
+                output TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS checkpoints_lookup "
+            "ON checkpoints (request_id, stage, inputs_hash)"
+        )
+        self._conn.commit()
+
+    def get(self, request_id: str, stage: str, stage_inputs_hash: str) -> Optional[Any]:
+        """Return the latest output recorded for this stage and inputs, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT output FROM checkpoints "
+                "WHERE request_id = ? AND stage = ? AND inputs_hash = ? "
+                "ORDER BY seq DESC LIMIT 1",
+                (request_id, stage, stage_inputs_hash),
+            ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def append(self, request_id: str, stage: str, stage_inputs_hash: str, output: Any) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO checkpoints (request_id, stage, inputs_hash, output, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    request_id,
+                    stage,
+                    stage_inputs_hash,
+                    json.dumps(output, default=str),
+                    time.time(),
+                ),
+            )
+            # Commit per stage: a crash loses at most the stage that was running.
+            self._conn.commit()
+
+    def latest(self, request_id: str, stage: str) -> Optional[Any]:
+        """Return the latest output recorded for this stage, whatever its inputs, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT output FROM checkpoints WHERE request_id = ? AND stage = ? "
+                "ORDER BY seq DESC LIMIT 1",
+                (request_id, stage),
+            ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def completed_stages(self, request_id: str) -> list[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT stage FROM checkpoints WHERE request_id = ? GROUP BY stage ORDER BY MIN(seq)",
+                (request_id,),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def close(self) -> None:
+        self._conn.close()
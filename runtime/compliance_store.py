@@ -0,0 +1,156 @@
+# runtime/compliance_store.py
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Union
+
+# Rules are numbered ("1. ... 2. ..."); each one is versioned on its own so editing a rule
+# only invalidates the verdicts that were computed against it.
+RULE_SPLIT_PATTERN = re.compile(r"(?:^|\s)(?=\d+\.\s)")
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.split())
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def split_compliance_rules(rules: str) -> list[str]:
+    parts = [normalize_text(p) for p in RULE_SPLIT_PATTERN.split(rules)]
+    return [p for p in parts if p]
+
+
+def rule_set_version(rules: str) -> dict[str, str]:
+    """Map each rule's hash to its text; the keys together version the whole rule set."""
+    return {text_hash(rule): rule for rule in split_compliance_rules(rules)}
+
+
+# SQLite-backed verdict store keyed by (contract hash, rule hash), safe to share across processes.
+class ComplianceVerdictStore:
+    def __init__(self, path: Union[str, Path] = "artifacts/compliance_verdicts.sqlite"):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30.0, check_same_thread=False)
+        # WAL lets readers in other worker processes proceed while one process writes.
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS verdicts (
+                contract_hash TEXT NOT NULL,
+                rule_hash TEXT NOT NULL,
+                is_compliant INTEGER NOT NULL,
+                rejection_reason TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (contract_hash, rule_hash)
+            )
+            """)
+        self._conn.commit()
+
+    def get(self, contract_hash: str, rule_hash: str) -> Optional[tuple[bool, str]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT is_compliant, rejection_reason FROM verdicts "
+                "WHERE contract_hash = ? AND rule_hash = ?",
+                (contract_hash, rule_hash),
+            ).fetchone()
+        if row is None:
+            return None
+        return bool(row[0]), row[1]
+
+    def put(self, contract_hash: str, rule_hash: str, is_compliant: bool, reason: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO verdicts VALUES (?, ?, ?, ?, ?)",
+                (contract_hash, rule_hash, int(is_compliant), reason, time.time()),
+            )
+            self._conn.commit()
+
+    def prune(self, active_rule_hashes: Iterable[str]) -> int:
+        """Drop verdicts computed against rules that are no longer in the rule set."""
+        active = list(active_rule_hashes)
+        placeholders = ",".join("?" for _ in active)
+        with self._lock:
+            cursor = self._conn.execute(
+                f"DELETE FROM verdicts WHERE rule_hash NOT IN ({placeholders})", active
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0]
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+# Checks contracts against rules in one call: (contracts, rules) -> {(contract_index, rule_index): verdict}.
+BatchEvaluator = Callable[[list[str], list[str]], dict[tuple[int, int], tuple[bool, str]]]
+
+
+def cached_compliance_verdict(
+    store: ComplianceVerdictStore,
+    contracts: list[str],
+    compliance_rules: str,
+    evaluate: BatchEvaluator,
+) -> tuple[bool, str]:
+    """
+    Combine per-(contract, rule) verdicts into one decision.
+
+    All misses are sent to evaluate in a single call covering the contracts and rules that have
+    any miss, so a cold request costs one evaluation, like checking without a store. The
+    decision is compliant only if every contract passes every rule; the rejection reason lists
+    each failing rule.
+    """
+    rules = rule_set_version(compliance_rules)
+    contract_hashes = [text_hash(contract) for contract in contracts]
+    verdicts = {
+        (contract_hash, rule_hash): store.get(contract_hash, rule_hash)
+        for contract_hash in contract_hashes
+        for rule_hash in rules
+    }
+
+    misses = [key for key, verdict in verdicts.items() if verdict is None]
+    if misses:
+        missing_contracts = list(dict.fromkeys(contract_hash for contract_hash, _ in misses))
+        missing_rules = list(dict.fromkeys(rule_hash for _, rule_hash in misses))
+        by_hash = dict(zip(contract_hashes, contracts))
+        evaluated = evaluate(
+            [by_hash[contract_hash] for contract_hash in missing_contracts],
+            [rules[rule_hash] for rule_hash in missing_rules],
+        )
+        for contract_hash, rule_hash in misses:
+            pair = (missing_contracts.index(contract_hash), missing_rules.index(rule_hash))
+            if pair not in evaluated:
+                raise ValueError(f"Evaluator returned no verdict for contract/rule {pair}")
+            verdicts[(contract_hash, rule_hash)] = evaluated[pair]
+            store.put(contract_hash, rule_hash, *evaluated[pair])
+
+    reasons = []
+    for (_, rule_hash), (is_compliant, reason) in verdicts.items():
+        if not is_compliant:
+            reasons.append(reason or f"Violates rule: {rules[rule_hash]}")
+    return not reasons, "; ".join(dict.fromkeys(reasons))
+
+
+def prewarm_compliance_store(
+    store: ComplianceVerdictStore,
+    contracts: Iterable[str],
+    compliance_rules: str,
+    evaluate: BatchEvaluator,
+) -> int:
+    """
+    Evaluate every contract against the current rules (one call per contract with misses)
+    and drop verdicts for edited rules.
+    """
+    evaluated = 0
+    for contract in contracts:
+        cached_compliance_verdict(store, [contract], compliance_rules, evaluate)
+        evaluated += 1
+    store.prune(rule_set_version(compliance_rules))
+    return evaluated
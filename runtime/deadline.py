@@ -0,0 +1,74 @@
+# runtime/deadline.py
+import math
+import threading
+import time
+from typing import Optional
+
+# Initial per-call latency estimates in seconds; refined from observed runs (EWMA).
+# For the Refine stages the estimate is per candidate attempt.
+DEFAULT_STAGE_SECONDS = {
+    "requirement": 2.0,
+    "retrieval": 0.5,
+    "shortlist_risk": 5.0,
+    "ranking": 4.0,
+    "risk": 4.0,
+    "compliance": 2.0,
+}
+
+
+class StageTimings:
+    def __init__(self, initial: Optional[dict[str, float]] = None, alpha: float = 0.2):
+        self.alpha = alpha
+        self._seconds = dict(initial or DEFAULT_STAGE_SECONDS)
+        self._lock = threading.Lock()
+
+    def estimate(self, stage: str) -> float:
+        with self._lock:
+            return self._seconds.get(stage, 0.0)
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            previous = self._seconds.get(stage, seconds)
+            self._seconds[stage] = (1 - self.alpha) * previous + self.alpha * seconds
+
+    def snapshot(self) -> dict[str, float]:
+        with self._lock:
+            return dict(self._seconds)
+
+
+# Tracks the remaining budget of one request and decides which stages to degrade.
+class DeadlineScheduler:
+    def __init__(self, deadline: Optional[float], timings: StageTimings):
+        """deadline is an absolute time.time() value; None means no time budget."""
+        self.deadline = deadline
+        self.timings = timings
+        self.degradations: list[str] = []
+
+    def remaining(self) -> float:
+        if self.deadline is None:
+            return math.inf
+        return self.deadline - time.time()
+
+    def reserve(self, *stages: str) -> float:
+        """Time to keep back for later stages, each at its cheapest (one attempt)."""
+        return sum(self.timings.estimate(stage) for stage in stages)
+
+    def attempts(self, stage: str, max_n: int, after: tuple[str, ...] = ()) -> int:
+        """How many Refine candidates fit in the budget left after reserving later stages."""
+        budget = self.remaining() - self.reserve(*after)
+        per_attempt = self.timings.estimate(stage)
+        if budget == math.inf or per_attempt <= 0:
+            return max_n
+        n = max(1, min(max_n, int(budget // per_attempt)))
+        if n < max_n:
+            self.degradations.append(f"{stage}_refine_n={n}")
+        return n
+
+    def can_afford(self, stage: str, after: tuple[str, ...] = ()) -> bool:
+        return self.remaining() >= self.timings.estimate(stage) + self.reserve(*after)
+
+    def degrade(self, name: str) -> None:
+        self.degradations.append(name)
+
+    def timed(self, stage: str, started: float, attempts: int = 1) -> None:
+        self.timings.observe(stage, (time.time() - started) / max(attempts, 1))
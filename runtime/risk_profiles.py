@@ -0,0 +1,62 @@
+# runtime/risk_profiles.py
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Iterable
+
+from MyMilvus.milvus_collections import row_text
+
+SUPPLIER_ID_PATTERN = re.compile(r"\bSUP-\d+")
+
+
+def join_supplier_audits(supplier_rows: Iterable[dict], audit_rows: Iterable[dict]) -> list[dict]:
+    """
+    Pair each supplier profile with its audit report(s) by SUP id.
+
+    Contract and audit rows carry ids like "SUP-1000_audit", so ids are matched by pattern
+    rather than by equality. Suppliers without an audit get an empty audit_context.
+    """
+    audits: dict[str, list[str]] = {}
+    for row in audit_rows:
+        match = SUPPLIER_ID_PATTERN.search(f"{row.get('supplier_id', '')} {row.get('text', '')}")
+        if match:
+            audits.setdefault(match.group(), []).append(row.get("text", ""))
+
+    suppliers = []
+    for row in supplier_rows:
+        match = SUPPLIER_ID_PATTERN.search(str(row.get("supplier_id", "")))
+        if not match:
+            continue
+        suppliers.append(
+            {
+                "supplier_id": match.group(),
+                "supplier_info": row_text(row),
+                "audit_context": "\n\n".join(audits.get(match.group(), [])),
+            }
+        )
+    return suppliers
+
+
+def precompute_risk_profiles(batch_miner, suppliers: list[dict]) -> dict[str, dict]:
+    """Score every supplier with the batched miner; one LM call per token-budgeted chunk."""
+    return dict(batch_miner(suppliers=suppliers).assessments)
+
+
+def save_risk_profiles(profiles: dict[str, dict], path) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(profiles, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def load_risk_profiles(path) -> dict[str, dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        profiles = json.load(f)
+    for supplier_id, profile in profiles.items():
+        if not {"risk_score", "risk_summary"} <= set(profile):
+            raise ValueError(f"Risk profile for {supplier_id} needs risk_score and risk_summary")
+    return profiles
@@ -0,0 +1,154 @@
+# runtime/semantic_cache.py
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+NUMBER_PATTERN = re.compile(r"(\d[\d,]*(?:\.\d+)?)\s*([km])?\b", re.IGNORECASE)
+
+
+def request_numbers(raw_request: str) -> tuple[float, ...]:
+    """Amounts in a request ('~50k', '50,000', '5 weeks'), with k/m suffixes applied."""
+    values = []
+    for number, suffix in NUMBER_PATTERN.findall(raw_request):
+        multiplier = {"k": 1_000, "m": 1_000_000}.get(suffix.lower(), 1)
+        values.append(float(number.replace(",", "")) * multiplier)
+    return tuple(sorted(values))
+
+
+def normalize(vector) -> np.ndarray:
+    array = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(array)
+    return array / norm if norm else array
+
+
+@dataclass
+class CacheEntry:
+    raw_request: str
+    vector: list[float]
+    result: dict[str, Any]
+    collection_versions: dict[str, str]
+    created_at: float = field(default_factory=time.time)
+    hits: int = 0
+    unit_vector: Optional[np.ndarray] = None
+    numbers: tuple[float, ...] = ()
+
+
+# Workflow-level cache: near-duplicate requests reuse a prior decision instead of rerunning every stage.
+class SemanticCache:
+    def __init__(
+        self,
+        embed_fn: Callable[[str], list[float]],
+        threshold: float = 0.95,
+        ttl_seconds: float = 3600.0,
+        max_entries: int = 256,
+        version_fn: Optional[Callable[[], dict[str, str]]] = None,
+    ):
+        """
+        embed_fn maps a raw request to a vector (e.g. the query embedding used by the retrievers).
+        version_fn returns the current version of each backing collection; entries stored under
+        a different version are dropped on the next lookup. Entries expire after ttl_seconds and
+        the least recently used entry is evicted once max_entries is reached. A hit also needs
+        the same amounts (budget, weeks) as the cached request: embeddings barely tell "~50k"
+        from "~500k", yet they fall on opposite sides of the $50,000 payment-term rule.
+        """
+        self.embed_fn = embed_fn
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.version_fn = version_fn or (lambda: {})
+        self._entries: OrderedDict[int, CacheEntry] = OrderedDict()
+        self._next_key = 0
+        self._lock = threading.Lock()
+        # Normalized entry vectors, one row per key in _keys. Replaced (never mutated) on every
+        # change, so a lookup can score a snapshot of it without holding the lock.
+        self._keys: list[int] = []
+        self._numbers: list[tuple[float, ...]] = []
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+
+    def _rebuild(self) -> None:
+        self._keys = list(self._entries)
+        self._numbers = [self._entries[key].numbers for key in self._keys]
+        vectors = [self._entries[key].unit_vector for key in self._keys]
+        self._matrix = np.vstack(vectors) if vectors else np.empty((0, 0), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _is_stale(self, entry: CacheEntry, now: float, versions: dict[str, str]) -> bool:
+        if now - entry.created_at > self.ttl_seconds:
+            return True
+        return entry.collection_versions != versions
+
+    def lookup(
+        self, raw_request: str, vector: Optional[list[float]] = None
+    ) -> Optional[dict[str, Any]]:
+        """Return the cached decision with its provenance, or None on a miss."""
+        query = normalize(vector if vector is not None else self.embed_fn(raw_request))
+        versions = self.version_fn()
+        now = time.time()
+
+        with self._lock:
+            stale = [k for k, e in self._entries.items() if self._is_stale(e, now, versions)]
+            for key in stale:
+                del self._entries[key]
+            if stale:
+                self._rebuild()
+            keys, numbers, matrix = self._keys, self._numbers, self._matrix
+
+        if not keys:
+            return None
+        # Scoring runs outside the lock so concurrent lookups don't queue behind each other.
+        scores = matrix @ query
+        wanted = request_numbers(raw_request)
+        matches = [i for i in np.flatnonzero(scores >= self.threshold) if numbers[i] == wanted]
+        if not matches:
+            return None
+        best = max(matches, key=lambda i: scores[i])
+        best_key, best_score = keys[best], float(scores[best])
+
+        with self._lock:
+            entry = self._entries.get(best_key)
+            if entry is None:
+                # Evicted while scoring.
+                return None
+            entry.hits += 1
+            self._entries.move_to_end(best_key)
+
+        return {
+            **entry.result,
+            "provenance": {
+                "source": "semantic_cache",
+                "similarity": round(best_score, 4),
+                "matched_request": entry.raw_request,
+                "cached_at": entry.created_at,
+                "collection_versions": dict(entry.collection_versions),
+            },
+        }
+
+    def store(
+        self, raw_request: str, result: dict[str, Any], vector: Optional[list[float]] = None
+    ) -> None:
+        entry = CacheEntry(
+            raw_request=raw_request,
+            vector=vector if vector is not None else self.embed_fn(raw_request),
+            result=dict(result),
+            collection_versions=self.version_fn(),
+            numbers=request_numbers(raw_request),
+        )
+        entry.unit_vector = normalize(entry.vector)
+        with self._lock:
+            self._entries[self._next_key] = entry
+            self._next_key += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._rebuild()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._rebuild()
@@ -0,0 +1,489 @@
+# runtime/server.py
+import itertools
+import json
+import math
+import multiprocessing
+import queue
+import statistics
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+
+from runtime.singleflight import SingleFlight
+
+
+class PoolSaturated(RuntimeError):
+    """Raised when the pending-request queue is full; the HTTP layer maps it to 429."""
+
+
+class WorkerError(RuntimeError):
+    """Raised when a worker process fails while running the workflow."""
+
+
+def build_worker_workflow(
+    backend: str = "openai",
+    lm_model: str = "openai/gpt-4o",
+    artifact: Optional[str] = None,
+    verdict_store: Optional[str] = None,
+    cache: bool = False,
+    micro_batch_size: int = 16,
+    micro_batch_wait_ms: float = 5.0,
+    shortlist_risk: bool = False,
+    risk_profiles: Optional[str] = None,
+    docstore: Optional[str] = None,
+    adaptive_refine: Optional[str] = None,
+):
+    """Build one worker's workflow with its own DSPy settings and retrievers."""
+    from pipeline import ProcurementWorkflow
+
+    if backend == "standin":
+        from runtime.standin import configure_standin
+
+        retrievers = configure_standin()
+    elif backend == "openai":
+        from config.retrievers import enable_document_store, enable_micro_batching
+        from config.settings import configure_dspy
+
+        retrievers = configure_dspy(lm_model=lm_model)
+        if micro_batch_size > 1:
+            enable_micro_batching(retrievers, micro_batch_size, micro_batch_wait_ms)
+        if docstore:
+            enable_document_store(retrievers, docstore)
+        for retriever in retrievers:
+            retriever.client.load_collection(retriever.collection)
+    else:
+        raise ValueError(f"Unsupported backend: {backend}")
+
+    workflow = ProcurementWorkflow(
+        *retrievers, singleflight=SingleFlight(), shortlist_risk=shortlist_risk
+    )
+    if risk_profiles:
+        from runtime.risk_profiles import load_risk_profiles
+
+        workflow.risk_profiles.update(load_risk_profiles(risk_profiles))
+    if artifact:
+        from runtime.artifacts import load_workflow
+
+        load_workflow(workflow, artifact)
+    if cache and backend == "standin":
+        from runtime.standin import configure_standin_cache
+
+        workflow.cache = configure_standin_cache()
+    elif cache:
+        from config.settings import configure_semantic_cache
+
+        workflow.cache = configure_semantic_cache(workflow.supplier_r)
+    if verdict_store:
+        from runtime.compliance_store import ComplianceVerdictStore
+
+        workflow.verdict_store = ComplianceVerdictStore(verdict_store)
+    if adaptive_refine:
+        from runtime.adaptive_refine import AdaptiveRefineController
+
+        workflow.refine_controller = AdaptiveRefineController(adaptive_refine)
+    return workflow
+
+
+def worker_stats(workflow) -> dict[str, dict[str, dict[str, int]]]:
+    """Micro-batching, single-flight and adaptive Refine counters of this worker process."""
+    import config.retrievers as retrievers_module
+
+    batching = {}
+    if retrievers_module._embed_batcher is not None:
+        batching["embed"] = retrievers_module._embed_batcher.stats()
+    for name in ("supplier_r", "contract_r", "audit_r"):
+        batcher = getattr(getattr(workflow, name), "_search_batcher", None)
+        if batcher is not None:
+            batching[f"search_{name}"] = batcher.stats()
+
+    coalescing = retrievers_module.SINGLE_FLIGHT.summary()
+    if workflow.singleflight is not None:
+        coalescing.update(workflow.singleflight.summary())
+    refine = workflow.refine_controller.summary() if workflow.refine_controller else {}
+    return {"micro_batching": batching, "coalescing": coalescing, "adaptive_refine": refine}
+
+
+def _worker_main(worker_id, options, threads, task_queue, result_queue):
+    try:
+        workflow = build_worker_workflow(**options)
+    except Exception as exc:
+        result_queue.put(("failed", worker_id, repr(exc), None))
+        return
+    result_queue.put(("ready", worker_id, None, None))
+
+    def serve_tasks():
+        while True:
+            task = task_queue.get()
+            if task is None:
+                return
+            task_id, raw_request, deadline = task
+            # Requests whose caller already gave up are dropped instead of spending LM calls.
+            if time.time() > deadline:
+                result_queue.put(("expired", task_id, None, None))
+                continue
+            try:
+                # The caller's timeout doubles as the workflow deadline, so stages degrade
+                # to answer in time instead of being abandoned.
+                result = workflow(raw_request, deadline=deadline)
+                result_queue.put(("ok", task_id, result, (worker_id, worker_stats(workflow))))
+            except Exception as exc:
+                result_queue.put(("error", task_id, repr(exc), None))
+
+    serving = [threading.Thread(target=serve_tasks) for _ in range(threads)]
+    for thread in serving:
+        thread.start()
+    for thread in serving:
+        thread.join()
+
+
+# Pool of pre-warmed worker processes, each fed from its own task queue.
+class WorkerPool:
+    def __init__(
+        self,
+        workers: int = 2,
+        threads_per_worker: int = 4,
+        queue_size: int = 32,
+        default_timeout: float = 60.0,
+        startup_timeout: float = 120.0,
+        **worker_options: Any,
+    ):
+        """
+        Each worker runs threads_per_worker requests concurrently so its micro-batchers can
+        merge their embedding and search calls. At most workers * threads_per_worker + queue_size
+        requests are admitted; beyond that submit() raises PoolSaturated.
+        """
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker
+        self.default_timeout = default_timeout
+        self._ctx = multiprocessing.get_context("spawn")
+        # One queue per worker: a worker killed inside get() would leave a shared queue locked.
+        self._task_queues = [self._ctx.Queue() for _ in range(workers)]
+        self._result_queue = self._ctx.Queue()
+        self._slots = threading.BoundedSemaphore(workers * threads_per_worker + queue_size)
+        self._futures: dict[int, Future] = {}
+        # task id -> worker id, so a dead worker's requests can be failed.
+        self._assigned: dict[int, int] = {}
+        self._worker_options = worker_options
+        self._closing = False
+        # Respawned workers that failed to build their workflow are not restarted again.
+        self._failed_workers: set[int] = set()
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._latencies: deque[float] = deque(maxlen=1000)
+        self._worker_stats: dict[int, dict[str, dict[str, dict[str, int]]]] = {}
+        self._counters = {
+            "requests_total": 0,
+            "completed_total": 0,
+            "rejected_total": 0,
+            "timeouts_total": 0,
+            "expired_total": 0,
+            "errors_total": 0,
+            "worker_restarts_total": 0,
+        }
+
+        self._processes = [self._start_worker(i) for i in range(workers)]
+        self._wait_until_ready(startup_timeout)
+
+        self._dispatcher = threading.Thread(target=self._dispatch_results, daemon=True)
+        self._dispatcher.start()
+
+    def _start_worker(self, worker_id: int):
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(
+                worker_id,
+                self._worker_options,
+                self.threads_per_worker,
+                self._task_queues[worker_id],
+                self._result_queue,
+            ),
+            daemon=True,
+        )
+        process.start()
+        return process
+
+    def _wait_until_ready(self, timeout: float) -> None:
+        ready = 0
+        deadline = time.time() + timeout
+        while ready < self.workers:
+            try:
+                kind, worker_id, detail, _ = self._result_queue.get(
+                    timeout=max(0.0, deadline - time.time())
+                )
+            except queue.Empty:
+                self._terminate_workers()
+                raise WorkerError(
+                    f"{self.workers - ready} of {self.workers} workers not ready "
+                    f"after {timeout:.0f}s"
+                ) from None
+            if kind == "failed":
+                self._terminate_workers()
+                raise WorkerError(f"Worker {worker_id} failed to start: {detail}")
+            ready += 1
+
+    def _terminate_workers(self) -> None:
+        for process in self._processes:
+            process.terminate()
+        self.close()
+
+    def _dispatch_results(self) -> None:
+        while True:
+            try:
+                message = self._result_queue.get(timeout=0.5)
+            except queue.Empty:
+                message = ()
+            if message is None:
+                return
+            if message:
+                self._handle_message(message)
+            self._reap_dead_workers()
+
+    def _handle_message(self, message) -> None:
+        kind, task_id, payload, extra = message
+        if kind == "ready":
+            return
+        if kind == "failed":
+            with self._lock:
+                self._failed_workers.add(task_id)
+            return
+        with self._lock:
+            self._assigned.pop(task_id, None)
+            future = self._futures.pop(task_id, None)
+            if kind == "ok" and extra is not None:
+                worker_id, stats = extra
+                self._worker_stats[worker_id] = stats
+            elif kind == "expired":
+                self._counters["expired_total"] += 1
+        if future is None:
+            # Already failed when its worker died; the slot was released then.
+            return
+        # The slot is held until the worker is actually done, even if the caller timed out.
+        self._slots.release()
+        if future.done():
+            return
+        if kind == "ok":
+            future.set_result(payload)
+        elif kind == "expired":
+            future.set_exception(FutureTimeoutError("Request expired before a worker ran it"))
+        else:
+            future.set_exception(WorkerError(payload))
+
+    def _reap_dead_workers(self) -> None:
+        dead = [
+            i
+            for i, process in enumerate(self._processes)
+            if not process.is_alive() and i not in self._failed_workers
+        ]
+        if not dead or self._closing:
+            return
+        # Results a worker sent just before exiting may still be queued; settle them first.
+        while True:
+            try:
+                message = self._result_queue.get_nowait()
+            except queue.Empty:
+                break
+            if message is None:
+                self._result_queue.put(None)
+                return
+            self._handle_message(message)
+
+        for worker_id in dead:
+            exitcode = self._processes[worker_id].exitcode
+            with self._lock:
+                if self._closing:
+                    return
+                if worker_id in self._failed_workers:
+                    continue
+                orphaned = [t for t, w in self._assigned.items() if w == worker_id]
+                futures = []
+                for task_id in orphaned:
+                    del self._assigned[task_id]
+                    future = self._futures.pop(task_id, None)
+                    if future is not None:
+                        futures.append(future)
+                self._worker_stats.pop(worker_id, None)
+                self._counters["worker_restarts_total"] += 1
+                # Unread tasks die with the old queue; their futures were failed above.
+                self._task_queues[worker_id].cancel_join_thread()
+                self._task_queues[worker_id] = self._ctx.Queue()
+                self._processes[worker_id] = self._start_worker(worker_id)
+            for future in futures:
+                self._slots.release()
+                if not future.done():
+                    future.set_exception(
+                        WorkerError(f"Worker {worker_id} exited with code {exitcode}")
+                    )
+
+    def submit(self, raw_request: str, timeout: Optional[float] = None) -> dict[str, Any]:
+        timeout = timeout or self.default_timeout
+        if not self._slots.acquire(blocking=False):
+            self._count("rejected_total")
+            raise PoolSaturated("Too many pending requests")
+
+        task_id = next(self._ids)
+        future: Future = Future()
+        with self._lock:
+            live = [i for i in range(self.workers) if i not in self._failed_workers]
+            if not live:
+                self._counters["errors_total"] += 1
+                self._slots.release()
+                raise WorkerError("No live workers")
+            # Send the request to the worker with the fewest outstanding requests.
+            load = Counter(self._assigned.values())
+            worker_id = min(live, key=lambda i: load[i])
+            self._futures[task_id] = future
+            self._assigned[task_id] = worker_id
+            self._counters["requests_total"] += 1
+            task_queue = self._task_queues[worker_id]
+        started = time.perf_counter()
+        task_queue.put((task_id, raw_request, time.time() + timeout))
+
+        try:
+            result = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            self._count("timeouts_total")
+            raise
+        except WorkerError:
+            self._count("errors_total")
+            raise
+
+        with self._lock:
+            self._counters["completed_total"] += 1
+            self._latencies.append(time.perf_counter() - started)
+        return result
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def metrics(self) -> dict[str, Any]:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            snapshot: dict[str, Any] = dict(self._counters)
+            snapshot["in_flight"] = len(self._futures)
+            # Sum each worker's latest counters per section and call.
+            sections: dict[str, dict[str, dict[str, int]]] = {
+                "micro_batching": {},
+                "coalescing": {},
+                "adaptive_refine": {},
+            }
+            for stats in self._worker_stats.values():
+                for section, calls in stats.items():
+                    for name, values in calls.items():
+                        totals = sections[section].setdefault(name, {})
+                        for field, value in values.items():
+                            if field != "max_batch_size":
+                                totals[field] = totals.get(field, 0) + value
+        snapshot["workers"] = self.workers
+        snapshot["latency_p50_seconds"] = statistics.median(latencies) if latencies else 0.0
+        snapshot["latency_p95_seconds"] = (
+            latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0.0
+        )
+        snapshot.update(sections)
+        return snapshot
+
+    def close(self) -> None:
+        with self._lock:
+            self._closing = True
+            processes = list(self._processes)
+            task_queues = list(self._task_queues)
+        for task_queue in task_queues:
+            for _ in range(self.threads_per_worker):
+                task_queue.put(None)
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._result_queue.put(None)
+        dispatcher = getattr(self, "_dispatcher", None)
+        if dispatcher is not None:
+            dispatcher.join(timeout=5)
+
+
+def format_prometheus(metrics: dict[str, Any]) -> str:
+    lines = []
+    for name, value in metrics.items():
+        if name in ("micro_batching", "coalescing", "adaptive_refine"):
+            continue
+        lines.append(f"procurement_{name} {value}")
+    for stage, totals in metrics.get("micro_batching", {}).items():
+        for field, value in totals.items():
+            lines.append(f'procurement_micro_batch_{field}_total{{call="{stage}"}} {value}')
+    for stage, totals in metrics.get("coalescing", {}).items():
+        for field, value in totals.items():
+            lines.append(f'procurement_singleflight_{field}_total{{call="{stage}"}} {value}')
+    for stage, totals in metrics.get("adaptive_refine", {}).items():
+        for field, value in totals.items():
+            lines.append(f'procurement_refine_{field}_total{{stage="{stage}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+def make_handler(pool: WorkerPool):
+    class ProcurementRequestHandler(BaseHTTPRequestHandler):
+        def _send(self, status: int, body: str, content_type: str = "application/json"):
+            payload = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if self.path == "/metrics":
+                self._send(200, format_prometheus(pool.metrics()), "text/plain; version=0.0.4")
+            elif self.path == "/healthz":
+                self._send(200, json.dumps({"status": "ok"}))
+            else:
+                self._send(404, json.dumps({"error": "not found"}))
+
+        def do_POST(self):
+            if self.path != "/procure":
+                self._send(404, json.dumps({"error": "not found"}))
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                raw_request = body["raw_request"]
+            except (ValueError, KeyError, TypeError):
+                self._send(400, json.dumps({"error": "expected JSON with raw_request"}))
+                return
+            timeout = body.get("timeout")
+            if timeout is not None:
+                if (
+                    isinstance(timeout, bool)
+                    or not isinstance(timeout, (int, float))
+                    or not math.isfinite(timeout)
+                    or timeout <= 0
+                ):
+                    self._send(400, json.dumps({"error": "timeout must be a positive number"}))
+                    return
+                # Callers may ask for less time than the server default, never more.
+                timeout = min(timeout, pool.default_timeout)
+
+            try:
+                result = pool.submit(raw_request, timeout=timeout)
+            except PoolSaturated as exc:
+                self._send(429, json.dumps({"error": str(exc)}))
+            except FutureTimeoutError:
+                self._send(504, json.dumps({"error": "request timed out"}))
+            except WorkerError as exc:
+                self._send(500, json.dumps({"error": str(exc)}))
+            else:
+                self._send(200, json.dumps(result, default=str))
+
+        def log_message(self, format, *args):
+            pass
+
+    return ProcurementRequestHandler
+
+
+def serve(pool: WorkerPool, host: str = "127.0.0.1", port: int = 8080) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), make_handler(pool))
+    print(
+        f"Serving procurement workflow on http://{host}:{server.server_port} ({pool.workers} workers)"
+    )
+    return server
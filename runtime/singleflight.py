@@ -0,0 +1,60 @@
+# runtime/singleflight.py
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable
+
+
+# Concurrent calls with the same key share one execution; keys are "<namespace>:<identity>".
+class SingleFlight:
+    def __init__(self, max_tracked_keys: int = 1024):
+        self.max_tracked_keys = max_tracked_keys
+        self._in_flight: dict[str, Future] = {}
+        self._stats: OrderedDict[str, dict[str, int]] = OrderedDict()
+        self._totals: dict[str, dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def _record(self, key: str, field: str) -> None:
+        entry = self._stats.pop(key, None) or {"executions": 0, "coalesced": 0}
+        entry[field] += 1
+        self._stats[key] = entry
+        namespace = key.split(":", 1)[0]
+        totals = self._totals.setdefault(namespace, {"executions": 0, "coalesced": 0})
+        totals[field] += 1
+        while len(self._stats) > self.max_tracked_keys:
+            self._stats.popitem(last=False)
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            pending = self._in_flight.get(key)
+            if pending is not None:
+                self._record(key, "coalesced")
+            else:
+                future: Future = Future()
+                self._in_flight[key] = future
+                self._record(key, "executions")
+
+        if pending is not None:
+            return pending.result()
+
+        try:
+            result = fn()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """Executions and coalesced calls per key (most recently used keys only)."""
+        with self._lock:
+            return {key: dict(entry) for key, entry in self._stats.items()}
+
+    def summary(self) -> dict[str, dict[str, int]]:
+        """Executions and coalesced calls per namespace, over the whole lifetime."""
+        with self._lock:
+            return {namespace: dict(entry) for namespace, entry in self._totals.items()}
@@ -0,0 +1,101 @@
+# runtime/standin.py
+# Local stand-ins for the OpenAI LM and the Milvus retrievers, so the service, benchmarks and
+# tests can drive the full workflow without network access or API spend.
+import re
+import zlib
+
+import dspy
+from dspy.utils.dummies import DummyLM
+
+STANDIN_DOCUMENTS = {
+    "suppliers": [
+        "supplier_id: SUP-1000. IT hardware supplier, servers and storage, ISO 27001 certified.",
+        "supplier_id: SUP-1001. Marketing services, digital campaigns.",
+        "supplier_id: SUP-1002. Raw materials for manufacturing, polymer X.",
+    ],
+    "contracts": [
+        "# Master Services Agreement (MSA)\n**Supplier:** (SUP-1000)\n* **Payment Terms:** Net 90",
+        "# Master Services Agreement (MSA)\n**Supplier:** (SUP-1001)\n* **Payment Terms:** Net 30",
+    ],
+    "audits": [
+        "# Supplier Audit Report (SUP-1000)\nNo critical non-compliances were observed.",
+        "# Supplier Audit Report (SUP-1001)\n**MAJOR:** Fire suppression certification expired.",
+    ],
+}
+
+# DummyLM answers by the first key found in the prompt; the output field names identify the stage.
+# top_supplier_id must come before estimated_budget because the ranking prompt embeds the spec;
+# assessments and verdicts come first because their prompt schemas mention risk_score and
+# is_compliant.
+STANDIN_ANSWERS = {
+    "assessments": {
+        "reasoning": "Only SUP-1001 has a major audit finding.",
+        "assessments": [
+            {"supplier_id": "SUP-1000", "risk_score": 20, "risk_summary": "Low risk."},
+            {"supplier_id": "SUP-1001", "risk_score": 70, "risk_summary": "Expired fire cert."},
+            {"supplier_id": "SUP-1002", "risk_score": 40, "risk_summary": "No audit on file."},
+        ],
+    },
+    "verdicts": {
+        "verdicts": [
+            {"contract": c, "rule": r, "is_compliant": True, "reason": ""}
+            for c in range(1, 4)
+            for r in range(1, 4)
+        ]
+    },
+    "top_supplier_id": {"reasoning": "Best category match.", "top_supplier_id": "SUP-1000"},
+    "risk_score": {
+        "reasoning": "Audit shows no critical findings.",
+        "risk_summary": "Low risk.",
+        "risk_score": 20,
+    },
+    "is_compliant": {"is_compliant": True, "rejection_reason": ""},
+    "estimated_budget": {
+        "item_category": "IT hardware",
+        "key_specifications": ["servers"],
+        "estimated_budget": "40k-60k USD",
+        "required_delivery_date": "5 weeks",
+    },
+}
+
+
+# Keyword-overlap retriever over a fixed document list; same interface as MilvusRetriever.
+class StandInRetriever(dspy.Retrieve):
+    def __init__(self, documents: list[str], top_k: int = 3):
+        super().__init__(k=top_k)
+        self.documents = documents
+
+    def forward(self, query: str, k=None, **kwargs) -> dspy.Prediction:
+        k = k or self.k
+        terms = set(str(query).lower().split())
+        ranked = sorted(
+            self.documents,
+            key=lambda doc: len(terms & set(doc.lower().split())),
+            reverse=True,
+        )
+        return dspy.Prediction(context=ranked[:k])
+
+
+def standin_embedding(text: str, dimension: int = 64) -> list[float]:
+    """Hashed bag-of-words vector, a local stand-in for the OpenAI query embedding."""
+    vector = [0.0] * dimension
+    for token in re.findall(r"\w+", text.lower()):
+        vector[zlib.crc32(token.encode("utf-8")) % dimension] += 1.0
+    return vector
+
+
+def configure_standin_cache(**kwargs):
+    """SemanticCache over standin_embedding; the stand-in documents never change version."""
+    from runtime.semantic_cache import SemanticCache
+
+    return SemanticCache(embed_fn=standin_embedding, version_fn=lambda: {"standin": "1"}, **kwargs)
+
+
+def configure_standin(answers: dict | None = None):
+    """Drop-in replacement for configure_dspy() backed by DummyLM and StandInRetrievers."""
+    dspy.settings.configure(lm=DummyLM(answers or STANDIN_ANSWERS), rm=None)
+    return (
+        StandInRetriever(STANDIN_DOCUMENTS["suppliers"]),
+        StandInRetriever(STANDIN_DOCUMENTS["contracts"]),
+        StandInRetriever(STANDIN_DOCUMENTS["audits"]),
+    )
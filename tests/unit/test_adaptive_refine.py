@@ -0,0 +1,111 @@
+from pipeline import ProcurementWorkflow
+from runtime.adaptive_refine import AdaptiveRefineController, request_features
+from runtime.standin import configure_standin
+
+
+def controller(tmp_path, **kwargs):
+    options = {"min_samples": 5, "explore_every": 1000, **kwargs}
+    return AdaptiveRefineController(tmp_path / "refine_stats.sqlite", **options)
+
+
+def test_retries_are_dropped_where_they_never_help(tmp_path):
+    stats = controller(tmp_path)
+    # Without a budget in the request, no candidate ever passes reward_budget_present.
+    for _ in range(5):
+        stats.observe("requirement", "budget=no", 4, 4, 1.0, [-1.0] * 4, 0.0)
+    # With one, a second attempt often fixes a first miss.
+    for rewards in ([-1.0, 1.0], [1.0], [-1.0, 1.0], [1.0], [1.0]):
+        stats.observe("requirement", "budget=yes", 4, 4, 1.0, rewards, 0.0)
+
+    assert stats.choose("requirement", "budget=no", 4) == (1, 0.0)
+    assert stats.choose("requirement", "budget=yes", 4) == (2, None)
+
+
+def test_runs_passing_on_a_later_attempt_count_as_first_attempt_failures(tmp_path):
+    stats = controller(tmp_path)
+    for _ in range(4):
+        for rewards in ([-1.0, 1.0], [1.0], [-1.0, 1.0], [1.0], [1.0]):
+            stats.observe("requirement", "budget=yes", 4, 4, 1.0, rewards, 0.0)
+
+    runs = stats._window("requirement", "budget=yes")
+
+    assert stats.pass_rates(runs, 4)[0] == 0.6
+    assert stats.choose("requirement", "budget=yes", 4) == (2, None)
+
+
+def test_stats_persist_and_report_calls_saved(tmp_path):
+    first = controller(tmp_path)
+    for _ in range(5):
+        first.observe("requirement", "budget=no", 4, 4, 1.0, [-1.0] * 4, 0.0)
+    first.observe("requirement", "budget=no", 1, 4, 0.0, [-1.0], 0.0)
+    first.close()
+
+    report = controller(tmp_path).stats()["requirement"]
+
+    assert report["runs"] == 6
+    assert report["lm_calls"] == 5 * 7 + 1
+    # The single-shot run skipped three attempts and their three feedback calls.
+    assert report["lm_calls_saved"] == 6.0
+    assert report["features"]["budget=no"]["pass_rate_by_attempt"] == [0.0, 0.0, 0.0, 0.0]
+
+
+def test_single_shot_runs_do_not_inflate_later_attempt_pass_rates(tmp_path):
+    stats = controller(tmp_path)
+    # Full-budget runs: 0.4 pass on the first attempt, 0.6 within two.
+    for rewards in ([1.0], [1.0], [-1.0, 1.0], [-1.0] * 4, [-1.0] * 4):
+        stats.observe("requirement", "budget=yes", 4, 4, 1.0, rewards, 0.0)
+    # Single-shot runs at the same 0.4 first-attempt pass rate.
+    for rewards in ([1.0], [1.0], [-1.0], [-1.0], [-1.0]):
+        stats.observe("requirement", "budget=yes", 1, 4, 0.0, rewards, 0.0)
+
+    runs = stats._window("requirement", "budget=yes")
+
+    assert stats.pass_rates(runs, 4) == [0.4, 0.6, 0.6, 0.6]
+
+
+def test_request_features():
+    def reward_fn(args, pred):
+        return 1.0
+
+    assert (
+        request_features("requirement", {"raw_request": "IT servers, ~50k"}, reward_fn)
+        == "budget=yes,reward=reward_fn"
+    )
+    assert (
+        request_features("requirement", {"raw_request": "IT servers soon"}, reward_fn)
+        == "budget=no,reward=reward_fn"
+    )
+    assert (
+        request_features("compliance", {"compliance_rules": "1. Net 90."}, reward_fn)
+        == "rules=one,reward=reward_fn"
+    )
+
+
+def test_compliance_checkers_with_different_rewards_keep_separate_statistics():
+    def reward_compliance_schema(args, pred):
+        return 1.0
+
+    def reward_rule_verdicts(args, pred):
+        return 1.0
+
+    inputs = {"rules": ["1. Net 90.", "2. ISO 27001."]}
+
+    assert request_features("compliance", inputs, reward_compliance_schema) != request_features(
+        "compliance", inputs, reward_rule_verdicts
+    )
+
+
+def test_workflow_switches_to_single_shot_once_first_attempts_pass(tmp_path):
+    stats = controller(tmp_path, min_samples=2)
+    workflow = ProcurementWorkflow(*configure_standin(), refine_controller=stats)
+
+    results = [workflow("IT servers, 50k, 5 weeks") for _ in range(4)]
+
+    assert {result["status"] for result in results} == {"APPROVED"}
+    assert stats.summary()["requirement"] == {"runs": 4, "lm_calls": 4, "lm_calls_saved": 0.0}
+    assert (
+        stats.stats()["requirement"]["features"]["budget=yes,reward=reward_budget_present"][
+            "next_n"
+        ]
+        == 1
+    )
@@ -0,0 +1,37 @@
+import json
+
+import dspy
+import pytest
+
+from pipeline import ProcurementWorkflow
+from runtime import artifacts
+
+
+def make_workflow():
+    return ProcurementWorkflow(supplier_r=None, contract_r=None, audit_r=None)
+
+
+def test_saved_workflow_round_trips_demos_and_refine_config(tmp_path):
+    compiled = make_workflow()
+    compiled.analyzer.predict.demos = [
+        dspy.Example(raw_request="servers, 50k", estimated_budget="50k USD").with_inputs(
+            "raw_request"
+        )
+    ]
+    compiled.refine_config["compliance"]["N"] = 2
+
+    path = artifacts.save_workflow(compiled, tmp_path / "workflow.json")
+    restored = artifacts.load_workflow(make_workflow(), path)
+
+    assert restored.refine_config["compliance"]["N"] == 2
+    assert restored.analyzer.predict.demos[0]["estimated_budget"] == "50k USD"
+
+
+def test_load_rejects_unknown_format_version(tmp_path):
+    path = artifacts.save_workflow(make_workflow(), tmp_path / "workflow.json")
+    state = json.loads(path.read_text())
+    state["format_version"] = 999
+    path.write_text(json.dumps(state))
+
+    with pytest.raises(ValueError, match="Unsupported artifact format"):
+        artifacts.load_workflow(make_workflow(), path)
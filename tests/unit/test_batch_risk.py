@@ -0,0 +1,105 @@
+import dspy
+from dspy.utils.dummies import DummyLM
+
+import config.retrievers
+from config.retrievers import MilvusRetriever
+from modules.risk_mining import BatchRiskMiner
+from pipeline import ProcurementWorkflow
+from runtime.risk_profiles import join_supplier_audits
+from runtime.standin import configure_standin
+
+SUPPLIERS = [
+    {"supplier_id": f"SUP-{1000 + i}", "supplier_info": "x" * 400, "audit_context": "ok"}
+    for i in range(3)
+]
+
+
+def assessment(supplier_id, score=30):
+    return {"supplier_id": supplier_id, "risk_score": score, "risk_summary": "Moderate."}
+
+
+def test_chunks_respect_the_token_budget():
+    miner = BatchRiskMiner(max_batch_tokens=250)
+
+    assert [len(chunk) for chunk in miner.chunk(SUPPLIERS)] == [2, 1]
+    assert [len(chunk) for chunk in BatchRiskMiner().chunk(SUPPLIERS)] == [3]
+
+
+def test_invented_ids_are_ignored_and_skipped_suppliers_retried():
+    lm = DummyLM(
+        [
+            # First batch skips SUP-1002 and invents SUP-9999.
+            {
+                "reasoning": "r",
+                "assessments": [
+                    assessment("SUP-1000"),
+                    assessment("SUP-1001"),
+                    assessment("SUP-9999"),
+                ],
+            },
+            {"reasoning": "r", "assessments": [assessment("SUP-1002", 80)]},
+        ]
+    )
+    with dspy.context(lm=lm):
+        result = BatchRiskMiner()(suppliers=SUPPLIERS)
+
+    assert sorted(result.assessments) == ["SUP-1000", "SUP-1001", "SUP-1002"]
+    assert result.assessments["SUP-1002"]["risk_score"] == 80
+    assert len(lm.history) == 2
+
+
+def test_shortlist_risk_scores_all_candidates_in_one_call():
+    workflow = ProcurementWorkflow(*configure_standin(), shortlist_risk=True)
+
+    result = workflow("IT servers, 50k, 5 weeks")
+
+    assert result["risk_score"] == 20
+    assert set(workflow.risk_profiles) == {"SUP-1000", "SUP-1001", "SUP-1002"}
+    assert workflow.risk_profiles["SUP-1001"]["risk_score"] == 70
+
+
+def test_suppliers_are_joined_with_suffixed_audit_ids():
+    suppliers = join_supplier_audits(
+        [{"supplier_id": "SUP-1000", "description": "IT hardware"}, {"supplier_id": "SUP-1001"}],
+        [{"supplier_id": "SUP-1000_audit", "text": "No findings."}],
+    )
+
+    assert suppliers[0] == {
+        "supplier_id": "SUP-1000",
+        "supplier_info": "IT hardware",
+        "audit_context": "No findings.",
+    }
+    assert suppliers[1]["audit_context"] == ""
+
+
+# Supplier rows as MyMilvus/milvus_init.py stores them: the text lives in "description".
+SUPPLIER_ROWS = [
+    {
+        "id": i,
+        "supplier_id": supplier_id,
+        "description": f"Supplier {name} (ID {supplier_id}) operates in the IT hardware domain.",
+    }
+    for i, (supplier_id, name) in enumerate([("SUP-1000", "Acme"), ("SUP-1001", "Beta")])
+]
+
+
+class FakeSupplierCollection:
+    def search(self, collection_name, data, limit, output_fields):
+        return [
+            [
+                {"id": row["id"], "entity": {f: row[f] for f in output_fields if f in row}}
+                for row in SUPPLIER_ROWS[:limit]
+            ]
+        ]
+
+
+def test_shortlist_risk_works_on_milvus_supplier_rows(monkeypatch):
+    _, contract_r, audit_r = configure_standin()
+    supplier_r = MilvusRetriever("uri", "user", "pw", "suppliers_demo")
+    supplier_r._client = FakeSupplierCollection()
+    monkeypatch.setattr(config.retrievers, "embed_query", lambda text: [0.1, 0.2])
+    workflow = ProcurementWorkflow(supplier_r, contract_r, audit_r, shortlist_risk=True)
+
+    workflow("IT servers, 50k, 5 weeks")
+
+    assert set(workflow.risk_profiles) == {"SUP-1000", "SUP-1001"}
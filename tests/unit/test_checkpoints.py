@@ -0,0 +1,38 @@
+import pytest
+
+from pipeline import ProcurementWorkflow
+from runtime.checkpoints import CheckpointStore, inputs_hash
+from runtime.standin import configure_standin
+
+
+def fail(**kwargs):
+    raise RuntimeError("rate limited")
+
+
+def test_store_returns_latest_output_for_matching_inputs(tmp_path):
+    store = CheckpointStore(tmp_path / "checkpoints.sqlite")
+    key = inputs_hash({"raw_request": "IT servers"})
+    store.append("REQ-1", "requirement", key, {"estimated_budget": "40k"})
+    store.append("REQ-1", "requirement", key, {"estimated_budget": "50k"})
+
+    assert store.get("REQ-1", "requirement", key) == {"estimated_budget": "50k"}
+    assert store.get("REQ-1", "requirement", inputs_hash({"raw_request": "other"})) is None
+    assert store.completed_stages("REQ-1") == ["requirement"]
+
+
+def test_resumed_run_skips_completed_stages(tmp_path):
+    store = CheckpointStore(tmp_path / "checkpoints.sqlite")
+
+    crashed = ProcurementWorkflow(*configure_standin(), checkpoints=store)
+    crashed.risk_miner = fail
+    with pytest.raises(RuntimeError, match="rate limited"):
+        crashed("IT servers, 50k, 5 weeks", request_id="REQ-1")
+
+    assert store.completed_stages("REQ-1") == ["requirement", "retrieval", "ranking"]
+
+    resumed = ProcurementWorkflow(*configure_standin(), checkpoints=store)
+    resumed.ranker = fail
+    result = resumed("IT servers, 50k, 5 weeks", request_id="REQ-1")
+
+    assert result["status"] == "APPROVED"
+    assert store.completed_stages("REQ-1")[-1] == "decision"
@@ -0,0 +1,130 @@
+import importlib
+import subprocess
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+import main
+from runtime.checkpoints import CheckpointStore
+from runtime.compliance_store import ComplianceVerdictStore
+
+
+def test_read_requests_accepts_jsonl_and_plain_lines(tmp_path):
+    path = tmp_path / "requests.jsonl"
+    path.write_text(
+        '{"request_id": "REQ-1", "raw_request": "IT servers, 50k"}\n'
+        "\n"
+        "Marketing campaign, 10k\n"
+    )
+
+    assert list(main.read_requests(path)) == [
+        ("REQ-1", "IT servers, 50k"),
+        ("3", "Marketing campaign, 10k"),
+    ]
+
+
+def test_parser_wires_subcommands():
+    args = main.build_parser().parse_args(["bench", "servers", "--repeat", "2", "--cache"])
+
+    assert args.func is main.cmd_bench
+    assert args.repeat == 2
+    assert args.cache is True
+
+
+def test_parser_rejects_a_non_positive_repeat(capsys):
+    with pytest.raises(SystemExit):
+        main.build_parser().parse_args(["bench", "--repeat", "0"])
+
+    assert "expected a positive integer" in capsys.readouterr().err
+
+
+def test_imports_have_no_client_side_effects(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    for name in ("config.retrievers", "config.settings", "MyMilvus.milvus_init"):
+        monkeypatch.delitem(sys.modules, name, raising=False)
+        importlib.import_module(name)
+
+
+@pytest.mark.parametrize(
+    "module, allowed",
+    [
+        ("config.settings", ()),
+        ("MyMilvus.milvus_init", ()),
+        # MilvusRetriever subclasses dspy.Retrieve, so dspy itself is needed here.
+        ("config.retrievers", ("dspy",)),
+    ],
+)
+def test_imports_leave_heavy_dependencies_unloaded(monkeypatch, module, allowed):
+    # Other tests have already imported them into this process, so check a fresh interpreter.
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    code = (
+        f"import sys, {module}; "
+        "print(','.join(m for m in ('dspy', 'pymilvus', 'numpy') if m in sys.modules))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=Path(main.__file__).parent,
+    ).stdout.strip()
+
+    assert set(filter(None, output.split(","))) <= set(allowed)
+
+
+def test_prewarm_compliance_fills_an_empty_verdict_store(tmp_path, monkeypatch):
+    import MyMilvus.milvus_collections as collections
+
+    store = ComplianceVerdictStore(tmp_path / "verdicts.sqlite")
+    agent = SimpleNamespace(
+        verdict_store=store,
+        contract_r=SimpleNamespace(client=None),
+        check_rules=lambda contracts, rules: {
+            (c, r): (True, "") for c in range(len(contracts)) for r in range(len(rules))
+        },
+    )
+    monkeypatch.setattr(main, "build_workflow", lambda args: agent)
+    monkeypatch.setattr(collections, "load_collection_names", lambda: {"contracts": "contracts"})
+    monkeypatch.setattr(collections, "iter_collection_texts", lambda client, name: ["Net 90"])
+
+    main.cmd_prewarm_compliance(SimpleNamespace())
+
+    assert len(store) == 3
+
+
+def test_resumed_batch_writes_checkpointed_decisions_that_missed_the_output(tmp_path, monkeypatch):
+    store = CheckpointStore(tmp_path / "checkpoints.sqlite")
+    # REQ-1 reached its decision checkpoint, then crashed before its result line was written.
+    store.append("REQ-1", "decision", "hash", {"status": "APPROVED"})
+    requests = tmp_path / "requests.jsonl"
+    requests.write_text(
+        "".join(f'{{"request_id": "REQ-{i}", "raw_request": "servers"}}\n' for i in range(3))
+    )
+    output = tmp_path / "results.jsonl"
+    output.write_text('{"request_id": "REQ-0", "result": {}}\n{"request_id": "REQ-2", "res')
+    ran = []
+
+    def agent(raw_request, request_id):
+        ran.append(request_id)
+        return {"status": "APPROVED"}
+
+    agent.checkpoints = store
+    monkeypatch.setattr(main, "build_workflow", lambda args: agent)
+
+    main.cmd_batch(SimpleNamespace(input=requests, output=output))
+
+    assert ran == ["REQ-2"]
+    assert main.written_request_ids(output) == {"REQ-0", "REQ-1", "REQ-2"}
+    assert len(output.read_text().splitlines()) == 4
+
+
+def test_standin_workflow_serves_repeated_requests_from_the_semantic_cache():
+    args = main.build_parser().parse_args(["run", "--standin", "--cache"])
+    agent = main.build_workflow(args)
+
+    agent("IT servers, 50k, 5 weeks")
+    hit = agent("IT servers, 50k, 5 weeks")
+
+    assert hit["provenance"]["source"] == "semantic_cache"
@@ -0,0 +1,97 @@
+import dspy
+
+from evaluation.harness import LMCallCounter
+from pipeline import ProcurementWorkflow
+from runtime.compliance_store import (
+    ComplianceVerdictStore,
+    cached_compliance_verdict,
+    prewarm_compliance_store,
+    split_compliance_rules,
+)
+from runtime.standin import configure_standin
+
+RULES = "1. Payment term must be 90 days. 2. Supplier must hold ISO 27001."
+CONTRACTS = ["# MSA\nPayment Terms: Net 90", "# MSA\nPayment Terms: Net 30"]
+
+
+class CountingEvaluator:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, contracts, rules):
+        self.calls.append((contracts, rules))
+        return {
+            (c, r): (
+                (False, "Payment term is 30 days")
+                if "90 days" in rule and "Net 30" in contract
+                else (True, "")
+            )
+            for c, contract in enumerate(contracts)
+            for r, rule in enumerate(rules)
+        }
+
+    @property
+    def pairs(self):
+        return [(c, r) for contracts, rules in self.calls for c in contracts for r in rules]
+
+
+def test_split_compliance_rules_separates_numbered_rules():
+    assert split_compliance_rules(RULES) == [
+        "1. Payment term must be 90 days.",
+        "2. Supplier must hold ISO 27001.",
+    ]
+
+
+def test_verdicts_are_reused_for_normalized_contract_text(tmp_path):
+    store = ComplianceVerdictStore(tmp_path / "verdicts.sqlite")
+    evaluate = CountingEvaluator()
+
+    first = cached_compliance_verdict(store, CONTRACTS, RULES, evaluate)
+    second = cached_compliance_verdict(
+        store, ["# MSA   Payment Terms:  Net 90 ", CONTRACTS[1]], RULES, evaluate
+    )
+
+    assert first == second == (False, "Payment term is 30 days")
+    # All four cold pairs are checked in a single call; the second lookup is fully cached.
+    assert len(evaluate.calls) == 1
+    assert len(evaluate.pairs) == 4
+
+
+def test_rule_edit_only_reevaluates_the_edited_rule(tmp_path):
+    store = ComplianceVerdictStore(tmp_path / "verdicts.sqlite")
+    prewarm_compliance_store(store, CONTRACTS, RULES, CountingEvaluator())
+
+    edited_rules = RULES.replace("ISO 27001", "ISO 27001 and ISO 9001")
+    evaluate = CountingEvaluator()
+    prewarm_compliance_store(store, CONTRACTS, edited_rules, evaluate)
+
+    assert {rule for _, rule in evaluate.pairs} == {"2. Supplier must hold ISO 27001 and ISO 9001."}
+    assert len(evaluate.pairs) == 2
+    assert len(store) == 4
+
+
+def test_store_is_shared_between_connections(tmp_path):
+    path = tmp_path / "verdicts.sqlite"
+    cached_compliance_verdict(ComplianceVerdictStore(path), CONTRACTS, RULES, CountingEvaluator())
+
+    evaluate = CountingEvaluator()
+    cached_compliance_verdict(ComplianceVerdictStore(path), CONTRACTS, RULES, evaluate)
+
+    assert evaluate.calls == []
+
+
+def lm_calls(workflow):
+    counter = LMCallCounter()
+    with dspy.context(callbacks=[counter]):
+        workflow("IT servers, 50k, 5 weeks")
+    return counter.calls
+
+
+def test_cold_store_costs_no_more_lm_calls_than_no_store(tmp_path):
+    baseline = lm_calls(ProcurementWorkflow(*configure_standin()))
+    workflow = ProcurementWorkflow(
+        *configure_standin(), verdict_store=ComplianceVerdictStore(tmp_path / "verdicts.sqlite")
+    )
+
+    assert lm_calls(workflow) == baseline == 4
+    assert lm_calls(workflow) == 3
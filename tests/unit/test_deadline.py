@@ -0,0 +1,72 @@
+import time
+
+from modules.safeguards import rule_only_compliance
+from pipeline import ProcurementWorkflow
+from runtime.deadline import DeadlineScheduler, StageTimings
+from runtime.standin import configure_standin
+
+TIMINGS = {"requirement": 1.0, "retrieval": 0.0, "ranking": 2.0, "risk": 2.0, "compliance": 1.0}
+
+
+def test_scheduler_reduces_refine_candidates_to_fit_the_budget():
+    scheduler = DeadlineScheduler(time.time() + 7.5, StageTimings(TIMINGS))
+
+    n = scheduler.attempts("requirement", 4, after=("ranking", "risk", "compliance"))
+
+    assert n == 2
+    assert scheduler.degradations == ["requirement_refine_n=2"]
+
+
+def test_scheduler_without_deadline_never_degrades():
+    scheduler = DeadlineScheduler(None, StageTimings(TIMINGS))
+
+    assert scheduler.attempts("compliance", 4) == 4
+    assert scheduler.can_afford("risk", after=("compliance",))
+    assert scheduler.degradations == []
+
+
+def test_generous_deadline_runs_every_stage():
+    workflow = ProcurementWorkflow(*configure_standin())
+
+    result = workflow("IT servers, 50k, 5 weeks", deadline=time.time() + 600)
+
+    assert result["status"] == "APPROVED"
+    assert result["degradations"] == []
+
+
+def test_expired_deadline_degrades_in_order():
+    workflow = ProcurementWorkflow(*configure_standin())
+    workflow.risk_profiles["SUP-1000"] = {"risk_score": 35, "risk_summary": "Cached profile."}
+
+    result = workflow("IT servers, 50k, 5 weeks", deadline=time.time() - 1)
+
+    assert result["degradations"] == [
+        "requirement_refine_n=1",
+        "risk_precomputed",
+        "compliance_rule_only",
+    ]
+    assert result["risk_score"] == 35
+    # SUP-1000's profile is ISO 27001 certified, so the rule-only check does not flag rule 2.
+    assert "Rule 2" not in result.get("reason", "")
+
+
+def test_rule_only_compliance_checks_payment_terms_and_certification():
+    verdict = rule_only_compliance(
+        ["Payment Terms: Net 30"], "SUP-1000, ISO 27001 certified.", "IT hardware", "40k-60k USD"
+    )
+
+    assert verdict.is_compliant is False
+    assert verdict.rejection_reason.startswith("Rule 1")
+    assert rule_only_compliance(["Payment Terms: Net 30"], "", "Fruit", "10k").is_compliant
+
+
+def test_rule_only_compliance_checks_certification_on_the_supplier():
+    contracts = ["Payment Terms: Net 90"]
+
+    certified = rule_only_compliance(
+        contracts, "SUP-1000. ISO 27001 certified.", "IT hardware", "40k-60k USD"
+    )
+    uncertified = rule_only_compliance(contracts, "SUP-1001.", "IT hardware", "40k-60k USD")
+
+    assert certified.is_compliant is True
+    assert uncertified.rejection_reason.startswith("Rule 2")
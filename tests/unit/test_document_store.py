@@ -0,0 +1,88 @@
+import pytest
+
+from config.retrievers import MilvusRetriever, enable_document_store
+from MyMilvus.document_store import DocumentStore, write_document_store
+
+CONTRACT = (
+    "# Master Services Agreement (MSA)\n**Supplier:** (SUP-1000)\n* **Payment Terms:** Net 90"
+)
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_documents_round_trip_through_the_mapped_store(tmp_path, compress):
+    count = write_document_store(
+        tmp_path / "contracts_demo", [(0, CONTRACT), (7, "Équipement ISO 27001")], compress
+    )
+    store = DocumentStore(tmp_path / "contracts_demo")
+
+    assert count == len(store) == 2
+    assert store.get(7) == "Équipement ISO 27001"
+    assert store.get(0) == CONTRACT
+    assert 3 not in store
+    store.close()
+
+
+def test_store_of_empty_documents_can_be_read(tmp_path):
+    write_document_store(tmp_path / "audits_demo", [(0, "")], compress=False)
+
+    assert DocumentStore(tmp_path / "audits_demo").get(0) == ""
+
+
+class FakeMilvus:
+    def __init__(self, collection_id=1):
+        self.collection_id = collection_id
+        self.search_fields = None
+        self.fetched = []
+
+    def has_collection(self, name):
+        return True
+
+    def describe_collection(self, name):
+        return {"collection_id": self.collection_id}
+
+    def get_collection_stats(self, name):
+        return {"row_count": 1}
+
+    def search(self, collection_name, data, limit, output_fields):
+        self.search_fields = output_fields
+        return [
+            [{"id": 0, "distance": 0.9, "entity": {}}, {"id": 5, "distance": 0.7, "entity": {}}]
+        ]
+
+    def get(self, collection_name, ids, output_fields):
+        self.fetched.extend(ids)
+        return [{"id": i, "description": f"Supplier {i}"} for i in ids]
+
+
+def test_thin_search_hydrates_text_locally_and_falls_back_for_unknown_ids(tmp_path):
+    write_document_store(tmp_path / "suppliers_demo", [(0, "Supplier 0 from the store")])
+    retriever = MilvusRetriever(
+        "uri",
+        "user",
+        "pw",
+        "suppliers_demo",
+        document_store=DocumentStore(tmp_path / "suppliers_demo"),
+    )
+    retriever._client = FakeMilvus()
+
+    hits = retriever.search_vectors([[0.1, 0.2]], 2)[0]
+
+    assert retriever.client.search_fields == []
+    assert retriever.hydrate(hits) == ["Supplier 0 from the store", "Supplier 5"]
+    assert retriever.client.fetched == [5]
+
+
+def test_store_from_another_collection_version_is_refused(tmp_path):
+    write_document_store(
+        tmp_path / "suppliers_demo", [(0, "Old supplier")], collection_version="1:1"
+    )
+    retriever = MilvusRetriever("uri", "user", "pw", "suppliers_demo")
+
+    retriever._client = FakeMilvus(collection_id=1)
+    enable_document_store([retriever], tmp_path)
+    assert retriever.document_store.get(0) == "Old supplier"
+
+    # Re-ingesting recreates the collection under a new id, so the store no longer matches.
+    retriever._client = FakeMilvus(collection_id=2)
+    with pytest.raises(ValueError, match="collection version 1:1"):
+        enable_document_store([retriever], tmp_path)
@@ -0,0 +1,139 @@
+import dspy
+
+from evaluation.dataset import build_labeled_requests
+from evaluation.harness import (
+    evaluate_config,
+    fastest_meeting_bar,
+    pareto_report,
+    procurement_metric,
+)
+from pipeline import ProcurementWorkflow
+from runtime.compliance_store import ComplianceVerdictStore
+from runtime.standin import configure_standin
+
+SUPPLIERS_CSV = (
+    "supplier_id,name,category,region,contact_email,sustainability_score,"
+    "contract_active,last_audit_date\n"
+    "SUP-1000,Acme Palm Oil Ltd,Palm Oil,Brazil,a@acme.com,80,True,2025-01-01\n"
+    "SUP-1001,Beta Palm Oil Ltd,Palm Oil,Brazil,b@beta.com,75,True,2025-02-01\n"
+)
+
+
+def test_labeled_requests_come_from_faker_suppliers(tmp_path):
+    (tmp_path / "contracts").mkdir()
+    (tmp_path / "suppliers.csv").write_text(SUPPLIERS_CSV)
+    (tmp_path / "contracts" / "SUP-1000_contract.md").write_text(
+        "* **Payment Terms:** Net 90 days from receipt of valid invoice."
+    )
+
+    examples = build_labeled_requests(tmp_path)
+
+    assert len(examples) == 2
+    assert examples[0].expected_suppliers == ["SUP-1000", "SUP-1001"]
+    assert examples[0].expected_category == "Palm Oil"
+    assert examples[0].expected_compliance["SUP-1000"] is True
+    assert "Brazil" in examples[0].raw_request
+
+
+def test_compliance_label_applies_the_iso_rule_to_it_hardware(tmp_path):
+    (tmp_path / "contracts").mkdir()
+    (tmp_path / "suppliers.csv").write_text(
+        SUPPLIERS_CSV.splitlines()[0]
+        + "\nSUP-2000,Gamma Servers Ltd,IT hardware,Brazil,g@gamma.com,90,True,2025-03-01\n"
+    )
+    (tmp_path / "contracts" / "SUP-2000_contract.md").write_text(
+        "* **Payment Terms:** Net 90 days from receipt of valid invoice."
+    )
+
+    [example] = build_labeled_requests(tmp_path)
+
+    assert example.expected_compliance == {"SUP-2000": False}
+
+
+def test_metric_scores_compliance_against_the_chosen_supplier():
+    example = dspy.Example(
+        expected_suppliers=["SUP-1000", "SUP-1001"],
+        expected_category="Palm Oil",
+        expected_compliance={"SUP-1000": True, "SUP-1001": False},
+    )
+
+    def score(supplier, status):
+        return procurement_metric(
+            example, {"supplier": supplier, "item_category": "Palm Oil", "status": status}
+        )
+
+    assert score("SUP-1001", "REQUIRES_REVIEW") == 1.0
+    assert score("SUP-1000", "REQUIRES_REVIEW") == 2 / 3
+    assert score("SUP-9999", "APPROVED") == 1 / 3
+
+
+def test_pareto_report_flags_dominated_configs():
+    report = pareto_report(
+        {
+            "baseline": {
+                "accuracy": 0.9,
+                "p95_latency_seconds": 8.0,
+                "lm_calls_per_request": 10,
+                "tokens_per_request": 9000,
+            },
+            "fast": {
+                "accuracy": 0.85,
+                "p95_latency_seconds": 3.0,
+                "lm_calls_per_request": 4,
+                "tokens_per_request": 4000,
+            },
+            "worse": {
+                "accuracy": 0.8,
+                "p95_latency_seconds": 4.0,
+                "lm_calls_per_request": 5,
+                "tokens_per_request": 5000,
+            },
+        }
+    )
+
+    assert [(row["config"], row["pareto"]) for row in report] == [
+        ("fast", True),
+        ("worse", False),
+        ("baseline", True),
+    ]
+    assert fastest_meeting_bar(report, 0.88)["config"] == "baseline"
+
+
+def test_evaluate_config_counts_lm_calls_and_restores_workflow():
+    workflow = ProcurementWorkflow(*configure_standin())
+    devset = [
+        dspy.Example(
+            raw_request="IT servers, 50k",
+            expected_suppliers=["SUP-1000"],
+            expected_category="IT hardware",
+            expected_compliance={"SUP-1000": True},
+        ).with_inputs("raw_request")
+    ] * 2
+
+    row = evaluate_config(workflow, devset, {"top_k": 1}, num_threads=2)
+
+    assert row["accuracy"] == 1.0
+    assert row["lm_calls_per_request"] == 4
+    assert workflow.supplier_r.k == 3
+
+
+def test_evaluate_config_leaves_shared_workflow_state_alone(tmp_path):
+    workflow = ProcurementWorkflow(*configure_standin())
+    store = ComplianceVerdictStore(tmp_path / "verdicts.sqlite")
+    workflow.verdict_store = store
+    devset = [
+        dspy.Example(
+            raw_request="IT servers, 50k",
+            expected_suppliers=["SUP-1000"],
+            expected_category="IT hardware",
+            expected_compliance={"SUP-1000": True},
+        ).with_inputs("raw_request")
+    ]
+
+    first = evaluate_config(workflow, devset, {}, num_threads=1)
+    second = evaluate_config(workflow, devset, {}, num_threads=1)
+
+    assert first["lm_calls_per_request"] == second["lm_calls_per_request"]
+    assert len(store) == 0
+    assert workflow.verdict_store is store
+    assert dspy.settings.lm.cache is True
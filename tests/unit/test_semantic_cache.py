@@ -0,0 +1,63 @@
+from runtime.semantic_cache import SemanticCache
+
+VECTORS = {
+    "IT servers for data center, ~50k, 5 weeks": [1.0, 0.0, 0.0],
+    "IT servers for our data center, about 50k, 5 weeks": [0.99, 0.05, 0.0],
+    "Marketing campaign, 10k": [0.0, 1.0, 0.0],
+}
+
+DECISION = {"status": "APPROVED", "supplier": "SUP-1001", "risk_score": 20}
+
+
+def make_cache(**kwargs):
+    return SemanticCache(embed_fn=VECTORS.__getitem__, **kwargs)
+
+
+def test_near_duplicate_request_returns_cached_decision_with_provenance():
+    cache = make_cache(threshold=0.95)
+    cache.store("IT servers for data center, ~50k, 5 weeks", DECISION)
+
+    hit = cache.lookup("IT servers for our data center, about 50k, 5 weeks")
+
+    assert hit["supplier"] == "SUP-1001"
+    assert hit["provenance"]["source"] == "semantic_cache"
+    assert hit["provenance"]["matched_request"] == "IT servers for data center, ~50k, 5 weeks"
+    assert cache.lookup("Marketing campaign, 10k") is None
+
+
+def test_entries_expire_after_ttl():
+    cache = make_cache(ttl_seconds=-1)
+    cache.store("IT servers for data center, ~50k, 5 weeks", DECISION)
+
+    assert cache.lookup("IT servers for data center, ~50k, 5 weeks") is None
+    assert len(cache) == 0
+
+
+def test_collection_version_change_invalidates_entries():
+    versions = {"suppliers": "1:20"}
+    cache = make_cache(version_fn=lambda: dict(versions))
+    cache.store("IT servers for data center, ~50k, 5 weeks", DECISION)
+
+    versions["suppliers"] = "2:20"
+
+    assert cache.lookup("IT servers for data center, ~50k, 5 weeks") is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = make_cache(max_entries=2)
+    cache.store("IT servers for data center, ~50k, 5 weeks", DECISION)
+    cache.store("Marketing campaign, 10k", {"status": "REQUIRES_REVIEW"})
+    cache.lookup("IT servers for data center, ~50k, 5 weeks")
+    cache.store("IT servers for our data center, about 50k, 5 weeks", DECISION)
+
+    assert len(cache) == 2
+    assert cache.lookup("Marketing campaign, 10k") is None
+
+
+def test_requests_differing_only_in_budget_do_not_share_a_decision():
+    vectors = {"IT servers, ~50k, 5 weeks": [1.0, 0.0], "IT servers, ~500k, 5 weeks": [0.99, 0.01]}
+    cache = SemanticCache(embed_fn=vectors.__getitem__, threshold=0.95)
+    cache.store("IT servers, ~50k, 5 weeks", DECISION)
+
+    assert cache.lookup("IT servers, ~500k, 5 weeks") is None
+    assert cache.lookup("IT servers, ~50k, 5 weeks")["supplier"] == "SUP-1001"
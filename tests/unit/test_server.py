@@ -0,0 +1,137 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pytest
+
+from runtime.batching import MicroBatcher
+from runtime.server import PoolSaturated, WorkerError, WorkerPool, format_prometheus, serve
+
+
+def test_micro_batcher_merges_concurrent_calls():
+    calls = []
+
+    def double_all(items):
+        calls.append(list(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(double_all, max_batch_size=8, max_wait_ms=50)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(batcher.submit, range(8)))
+
+    assert results == [item * 2 for item in range(8)]
+    assert len(calls) < 8
+    assert batcher.stats()["items"] == 8
+
+
+def test_micro_batcher_propagates_batch_errors():
+    def fail(items):
+        raise RuntimeError("milvus unavailable")
+
+    with pytest.raises(RuntimeError, match="milvus unavailable"):
+        MicroBatcher(fail, max_wait_ms=1).submit("query")
+
+
+@pytest.fixture(scope="module")
+def standin_pool():
+    pool = WorkerPool(workers=1, threads_per_worker=2, queue_size=0, backend="standin")
+    yield pool
+    pool.close()
+
+
+def test_pool_serves_requests_over_http(standin_pool):
+    server = serve(standin_pool, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    try:
+        request = urllib.request.Request(
+            f"{base}/procure",
+            data=json.dumps({"raw_request": "IT servers, 50k, 5 weeks"}).encode(),
+            method="POST",
+        )
+        result = json.loads(urllib.request.urlopen(request).read())
+        metrics = urllib.request.urlopen(f"{base}/metrics").read().decode()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert result["status"] == "APPROVED"
+    assert "procurement_completed_total 1" in metrics
+
+
+def test_pool_rejects_requests_beyond_capacity(standin_pool):
+    # Occupy both worker threads' slots without a real request behind them.
+    for _ in range(2):
+        standin_pool._slots.acquire()
+    try:
+        with pytest.raises(PoolSaturated):
+            standin_pool.submit("IT servers")
+    finally:
+        for _ in range(2):
+            standin_pool._slots.release()
+
+    assert standin_pool.metrics()["rejected_total"] == 1
+
+
+def test_format_prometheus_labels_micro_batch_counters():
+    text = format_prometheus(
+        {"requests_total": 3, "micro_batching": {"embed": {"items": 6, "batches": 2}}}
+    )
+
+    assert "procurement_requests_total 3" in text
+    assert 'procurement_micro_batch_items_total{call="embed"} 6' in text
+
+
+def test_pool_fails_fast_when_workers_do_not_start_in_time():
+    with pytest.raises(WorkerError, match="not ready"):
+        WorkerPool(workers=1, startup_timeout=0.01, backend="standin")
+
+
+def test_pool_fails_requests_of_a_dead_worker_and_respawns_it(standin_pool):
+    free_slots = standin_pool._slots._value
+    # A request assigned to worker 0, with no real task behind it.
+    standin_pool._slots.acquire()
+    future = Future()
+    with standin_pool._lock:
+        standin_pool._futures[-1] = future
+        standin_pool._assigned[-1] = 0
+    dead = standin_pool._processes[0]
+    dead.kill()
+
+    with pytest.raises(WorkerError, match="Worker 0 exited"):
+        future.result(timeout=10)
+
+    assert standin_pool._slots._value == free_slots
+    assert standin_pool._processes[0] is not dead
+    assert standin_pool.submit("IT servers, 50k, 5 weeks")["status"] == "APPROVED"
+    assert standin_pool.metrics()["worker_restarts_total"] == 1
+
+
+def post_procure(pool, body: str) -> int:
+    server = serve(pool, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{server.server_port}/procure", data=body.encode(), method="POST"
+    )
+    try:
+        return urllib.request.urlopen(request).status
+    except urllib.error.HTTPError as exc:
+        return exc.code
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.parametrize("timeout", ['"soon"', "Infinity", "NaN", "-1"])
+def test_handler_rejects_invalid_timeouts(standin_pool, timeout):
+    body = f'{{"raw_request": "IT servers", "timeout": {timeout}}}'
+
+    assert post_procure(standin_pool, body) == 400
+
+
+def test_handler_caps_huge_timeouts_at_the_server_default(standin_pool):
+    body = '{"raw_request": "IT servers, 50k, 5 weeks", "timeout": 1e308}'
+
+    assert post_procure(standin_pool, body) == 200
@@ -0,0 +1,61 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from runtime.singleflight import SingleFlight
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    group = SingleFlight()
+    release = threading.Event()
+    executions = []
+
+    def slow_audit_lookup():
+        executions.append(1)
+        release.wait(timeout=5)
+        return "audit SUP-1000"
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [
+            executor.submit(group.do, "retrieve:audits_demo:SUP-1000", slow_audit_lookup)
+            for _ in range(4)
+        ]
+        time.sleep(0.1)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert results == ["audit SUP-1000"] * 4
+    assert len(executions) == 1
+    assert group.stats()["retrieve:audits_demo:SUP-1000"] == {"executions": 1, "coalesced": 3}
+    assert group.summary() == {"retrieve": {"executions": 1, "coalesced": 3}}
+
+
+def test_sequential_calls_are_not_coalesced():
+    group = SingleFlight()
+    group.do("embed:servers", lambda: [0.1])
+    group.do("embed:servers", lambda: [0.1])
+
+    assert group.stats()["embed:servers"] == {"executions": 2, "coalesced": 0}
+
+
+def test_errors_are_shared_and_the_key_is_released():
+    group = SingleFlight()
+
+    def fail():
+        raise RuntimeError("milvus restarting")
+
+    with pytest.raises(RuntimeError, match="milvus restarting"):
+        group.do("risk:abc", fail)
+
+    assert group.do("risk:abc", lambda: "recovered") == "recovered"
+
+
+def test_tracked_keys_are_bounded():
+    group = SingleFlight(max_tracked_keys=2)
+    for supplier_id in ("SUP-1000", "SUP-1001", "SUP-1002"):
+        group.do(f"risk:{supplier_id}", lambda: None)
+
+    assert list(group.stats()) == ["risk:SUP-1001", "risk:SUP-1002"]
+    assert group.summary()["risk"]["executions"] == 3
@@ -0,0 +1,108 @@
+import pytest
+
+from MyMilvus.snapshots import (
+    SnapshotEmbeddingFunction,
+    export_snapshot,
+    import_snapshot,
+    snapshot_vectors,
+)
+
+COLLECTIONS = {"suppliers": "suppliers_demo", "audits": "audits_demo"}
+
+
+class FakeIterator:
+    def __init__(self, rows, batch_size):
+        self.batches = [rows[i : i + batch_size] for i in range(0, len(rows), batch_size)]
+
+    def next(self):
+        return self.batches.pop(0) if self.batches else []
+
+    def close(self):
+        pass
+
+
+# Just enough of MilvusClient for export and import.
+class FakeMilvus:
+    def __init__(self, data=None):
+        self.data = data or {}
+        self.insert_calls = 0
+
+    def query_iterator(self, collection_name, batch_size, filter, output_fields):
+        return FakeIterator(self.data[collection_name], batch_size)
+
+    def has_collection(self, name):
+        return name in self.data
+
+    def drop_collection(self, name):
+        del self.data[name]
+
+    def create_collection(self, collection_name, dimension, **kwargs):
+        self.data[collection_name] = []
+
+    def insert(self, name, rows):
+        self.insert_calls += 1
+        self.data[name].extend(rows)
+
+
+def source_milvus():
+    return FakeMilvus(
+        {
+            "suppliers_demo": [
+                {
+                    "id": i,
+                    "supplier_id": f"SUP-{1000 + i}",
+                    "description": f"S{i}",
+                    "vector": [i, 1],
+                }
+                for i in range(3)
+            ],
+            "audits_demo": [
+                {"id": 0, "supplier_id": "SUP-1000_audit", "text": "No findings.", "vector": [0, 2]}
+            ],
+        }
+    )
+
+
+def test_snapshot_round_trip_restores_rows_in_batches(tmp_path):
+    manifest = export_snapshot(source_milvus(), COLLECTIONS, tmp_path, "emb-small", 2, batch_size=2)
+    target = FakeMilvus()
+
+    rows = import_snapshot(target, tmp_path, COLLECTIONS, "emb-small", 2, batch_size=2)
+
+    assert manifest["collections"]["suppliers"]["rows"] == 3
+    assert rows == {"suppliers": 3, "audits": 1}
+    assert target.data["suppliers_demo"][2] == {
+        "id": 2,
+        "supplier_id": "SUP-1002",
+        "description": "S2",
+        "vector": [2.0, 1.0],
+    }
+    assert target.insert_calls == 3
+
+
+def test_import_refuses_another_embedding_model_or_dimension(tmp_path):
+    export_snapshot(source_milvus(), COLLECTIONS, tmp_path, "emb-small", 2)
+
+    with pytest.raises(ValueError, match="emb-small"):
+        import_snapshot(FakeMilvus(), tmp_path, COLLECTIONS, "emb-large", 2)
+    with pytest.raises(ValueError, match="dimension"):
+        import_snapshot(FakeMilvus(), tmp_path, COLLECTIONS, "emb-small", 3)
+
+
+def test_ingest_reuses_snapshot_vectors_for_unchanged_text(tmp_path):
+    export_snapshot(source_milvus(), COLLECTIONS, tmp_path, "emb-small", 2)
+    embedded = []
+
+    class Embedder:
+        def encode_documents(self, docs):
+            embedded.extend(docs)
+            return [[9.0, 9.0] for _ in docs]
+
+    embedding_fn = SnapshotEmbeddingFunction(
+        snapshot_vectors(tmp_path, "emb-small", 2), lambda: Embedder()
+    )
+
+    assert embedding_fn.encode_documents(["No findings."]) == [[0.0, 2.0]]
+    assert embedding_fn.encode_documents(["Edited audit."]) == [[9.0, 9.0]]
+    assert embedded == ["Edited audit."]
+    assert (embedding_fn.reused, embedding_fn.embedded) == (1, 1)